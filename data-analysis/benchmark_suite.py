@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')  # benchmarks never open windows; plt.show() becomes a no-op
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from protocol_analyzer import IoTProtocolAnalyzer
+from create_visualizations import ProtocolVisualizationGenerator
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000, 10000000]
+DEFAULT_FIGURE_LIMIT = 1000000
+SERIAL_FORMAT = 'Data: %d,LwM2M,%d,%d,%d,%d,%d,%d,%d'
+SERIAL_COLUMNS = ['Timestamp', 'MessageID', 'TotalSize', 'PayloadSize', 'TransportOverhead',
+                  'SessionOverhead', 'PresentationOverhead', 'ApplicationOverhead']
+
+
+def generate_dataset(n_messages, workdir):
+    """Synthetic LwM2M serial log + Matter CSV with n_messages split between protocols"""
+    generator = IoTProtocolAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        generator.create_simulated_lwm2m_data(n_messages=n_messages // 2)
+        generator.create_simulated_matter_data(n_messages=n_messages - n_messages // 2)
+
+    serial_file = os.path.join(workdir, f'lwm2m_serial_{n_messages}.log')
+    np.savetxt(serial_file, generator.lwm2m_data[SERIAL_COLUMNS].to_numpy(), fmt=SERIAL_FORMAT)
+    csv_file = os.path.join(workdir, f'matter_{n_messages}.csv')
+    generator.matter_data.to_csv(csv_file, index=False)
+    return serial_file, csv_file, generator.lwm2m_data, generator.matter_data
+
+
+def benchmark_paths(serial_file, csv_file, lwm2m_df, matter_df, with_figures):
+    """(name, setup, run) for each public path; setup returns the state run operates on"""
+    def loaded_analyzer():
+        analyzer = IoTProtocolAnalyzer()
+        analyzer.load_lwm2m_data(serial_file)
+        analyzer.load_matter_data(csv_file)
+        return analyzer
+
+    def combined_analyzer():
+        analyzer = loaded_analyzer()
+        analyzer.combine_datasets()
+        return analyzer
+
+    def figure_generator():
+        # Serial logs carry no MessageType, so figures use the synthetic tables directly
+        generator = ProtocolVisualizationGenerator()
+        generator.use_data(lwm2m_df, matter_df)
+        return generator
+
+    paths = [
+        ('serial_log_parsing', IoTProtocolAnalyzer, lambda a: a.load_lwm2m_data(serial_file)),
+        ('csv_loading', IoTProtocolAnalyzer, lambda a: a.load_matter_data(csv_file)),
+        ('combine_datasets', loaded_analyzer, lambda a: a.combine_datasets()),
+        ('perform_statistical_analysis', combined_analyzer,
+         lambda a: a.perform_statistical_analysis()),
+        ('analyze_efficiency_by_payload_size', combined_analyzer,
+         lambda a: a.analyze_efficiency_by_payload_size()),
+    ]
+    if with_figures:
+        paths += [
+            ('create_comprehensive_comparison', figure_generator,
+             lambda g: g.create_comprehensive_comparison()),
+            ('create_osi_layer_analysis', figure_generator,
+             lambda g: g.create_osi_layer_analysis()),
+            ('create_research_summary_infographic', figure_generator,
+             lambda g: g.create_research_summary_infographic()),
+        ]
+    return paths
+
+
+def measure(setup, run, repeats):
+    """Median wall time over repeats, plus peak traced allocation of one extra run"""
+    timings = []
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        timings.append(time.perf_counter() - start)
+        plt.close('all')
+
+    # tracemalloc slows Python code down, so memory gets its own run
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    plt.close('all')
+
+    return statistics.median(timings), peak / (1024 * 1024)
+
+
+def run_benchmarks(sizes, repeats=3, figure_limit=DEFAULT_FIGURE_LIMIT):
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Figure builders save into the working directory
+        os.chdir(workdir)
+        try:
+            for n_messages in sizes:
+                dataset = generate_dataset(n_messages, workdir)
+                with_figures = n_messages <= figure_limit
+                for name, setup, run in benchmark_paths(*dataset, with_figures):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        seconds, peak_mb = measure(setup, run, repeats)
+                    results.append({'path': name, 'n_messages': n_messages,
+                                    'seconds': seconds, 'peak_mb': peak_mb})
+                    print(f"  {name:<38} n={n_messages:>10,}  "
+                          f"{seconds * 1000:10.1f} ms  {peak_mb:9.1f} MB")
+                if not with_figures:
+                    print(f"  (figure builders skipped above {figure_limit:,} messages)")
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'matplotlib': matplotlib.__version__,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print time/memory ratios against a baseline; return the regressed entries"""
+    reference = {(r['path'], r['n_messages']): r for r in baseline['results']}
+    regressions = []
+    print("\n" + "="*60)
+    print("📈 COMPARISON WITH BASELINE")
+    print("="*60)
+    for result in results:
+        base = reference.get((result['path'], result['n_messages']))
+        if base is None:
+            continue
+        time_ratio = result['seconds'] / base['seconds'] if base['seconds'] else float('inf')
+        memory_ratio = result['peak_mb'] / base['peak_mb'] if base['peak_mb'] else float('inf')
+        regressed = time_ratio > threshold or memory_ratio > threshold
+        marker = "❌" if regressed else "✅"
+        print(f"  {marker} {result['path']:<38} n={result['n_messages']:>10,}  "
+              f"time x{time_ratio:.2f}  memory x{memory_ratio:.2f}")
+        if regressed:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for ingest, statistics and rendering")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Total message counts to benchmark")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--figure-limit', type=int, default=DEFAULT_FIGURE_LIMIT,
+                        help="Largest message count the figure builders are run at")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--save-baseline', metavar='PATH',
+                        help="Also write these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help="Time or memory ratio above which a path counts as regressed")
+    args = parser.parse_args()
+
+    print("🏁 IoT Protocol Analysis Benchmarks")
+    print("=" * 50)
+
+    report = {'environment': environment(), 'results': run_benchmarks(
+        args.sizes, repeats=args.repeats, figure_limit=args.figure_limit)}
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved as {args.output}")
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Baseline saved as {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} path(s) regressed beyond x{args.threshold}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+# CASE handshake sizes shared by the analysis and the Matter test server
+# (matter-project/tools/session_cache.py loads this module)
+
+# Approximate on-air sizes of the CASE messages (TLV payload + Matter headers)
+CASE_SIGMA1_BYTES = 140
+CASE_SIGMA2_BYTES = 560
+CASE_SIGMA3_BYTES = 530
+CASE_SIGMA1_RESUME_BYTES = 176      # Sigma1 + resumptionID + initiatorResumeMIC
+CASE_SIGMA2_RESUME_BYTES = 60
+CASE_STATUS_REPORT_BYTES = 40
+
+FULL_HANDSHAKE_BYTES = CASE_SIGMA1_BYTES + CASE_SIGMA2_BYTES + CASE_SIGMA3_BYTES
+RESUME_HANDSHAKE_BYTES = CASE_SIGMA1_RESUME_BYTES + CASE_SIGMA2_RESUME_BYTES + CASE_STATUS_REPORT_BYTES
@@ -1,13 +1,18 @@
+import argparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 import numpy as np
 from matplotlib.patches import Rectangle
+from quantile_sketch import SketchCollection
+from instrumentation import Profiler, profiled_stage, add_profiling_arguments, profiler_from_args
 import warnings
 warnings.filterwarnings('ignore')
 
 class ProtocolVisualizationGenerator:
-    def __init__(self):
+    def __init__(self, profiler=None):
+        self.profiler = profiler or Profiler()
+        
         # Set style for publication-quality plots
         plt.style.use('seaborn-v0_8-whitegrid')
         sns.set_palette("husl")
@@ -31,6 +36,7 @@ class ProtocolVisualizationGenerator:
             'Application': '#1B998B'   # Teal
         }
         
+    @profiled_stage(rows=lambda self: len(self.combined_df))
     def load_data(self):
         """Load or create sample data for visualization"""
         # Create comprehensive sample datasets
@@ -99,12 +105,20 @@ class ProtocolVisualizationGenerator:
                 'MessageType': msg_type
             })
         
-        self.lwm2m_df = pd.DataFrame(lwm2m_data)
-        self.matter_df = pd.DataFrame(matter_data)
-        self.combined_df = pd.concat([self.lwm2m_df, self.matter_df], ignore_index=True)
+        self.use_data(pd.DataFrame(lwm2m_data), pd.DataFrame(matter_data))
         
         print("✅ Sample data created for visualization")
     
+    def use_data(self, lwm2m_df, matter_df):
+        """Plot existing message tables (e.g. from IoTProtocolAnalyzer) instead of samples"""
+        self.lwm2m_df = lwm2m_df
+        self.matter_df = matter_df
+        self.combined_df = pd.concat([self.lwm2m_df, self.matter_df], ignore_index=True)
+        
+        self.sketches = SketchCollection()
+        self.sketches.update_frame(self.combined_df)
+    
+    @profiled_stage(rows=lambda self: len(self.combined_df))
     def create_comprehensive_comparison(self):
         """Create a comprehensive 6-panel comparison figure"""
         fig, axes = plt.subplots(2, 3, figsize=(18, 12))
@@ -113,11 +127,15 @@ class ProtocolVisualizationGenerator:
         
         # 1. Message Size Distribution
         ax1 = axes[0, 0]
-        lwm2m_sizes = self.lwm2m_df['TotalSize']
-        matter_sizes = self.matter_df['TotalSize']
-        
-        ax1.hist(lwm2m_sizes, bins=15, alpha=0.7, label='LwM2M', color=self.colors['LwM2M'], density=True)
-        ax1.hist(matter_sizes, bins=15, alpha=0.7, label='Matter', color=self.colors['Matter'], density=True)
+        lwm2m_sketch = self.sketches.get('LwM2M', 'TotalSize')
+        matter_sketch = self.sketches.get('Matter', 'TotalSize')
+        
+        # Histograms come from the quantile sketches so fleet-wide data never
+        # has to be held in memory
+        for protocol, sketch in [('LwM2M', lwm2m_sketch), ('Matter', matter_sketch)]:
+            density, edges = sketch.histogram(bins=15, density=True)
+            ax1.hist(edges[:-1], bins=edges, weights=density, alpha=0.7, label=protocol,
+                     color=self.colors[protocol])
         ax1.set_xlabel('Message Size (bytes)')
         ax1.set_ylabel('Density')
         ax1.set_title('Message Size Distribution')
@@ -125,8 +143,8 @@ class ProtocolVisualizationGenerator:
         ax1.grid(True, alpha=0.3)
         
         # Add statistics
-        ax1.axvline(lwm2m_sizes.mean(), color=self.colors['LwM2M'], linestyle='--', alpha=0.8)
-        ax1.axvline(matter_sizes.mean(), color=self.colors['Matter'], linestyle='--', alpha=0.8)
+        ax1.axvline(self.lwm2m_df['TotalSize'].mean(), color=self.colors['LwM2M'], linestyle='--', alpha=0.8)
+        ax1.axvline(self.matter_df['TotalSize'].mean(), color=self.colors['Matter'], linestyle='--', alpha=0.8)
         
         # 2. OSI Layer Breakdown (Stacked Bar)
         ax2 = axes[0, 1]
@@ -196,8 +214,8 @@ class ProtocolVisualizationGenerator:
         # 4. Box Plot Comparison
         ax4 = axes[1, 0]
         
-        data_for_box = [self.lwm2m_df['TotalSize'], self.matter_df['TotalSize']]
-        box_plot = ax4.boxplot(data_for_box, labels=['LwM2M', 'Matter'], patch_artist=True)
+        box_stats = [lwm2m_sketch.box_stats(label='LwM2M'), matter_sketch.box_stats(label='Matter')]
+        box_plot = ax4.bxp(box_stats, patch_artist=True)
         
         box_plot['boxes'][0].set_facecolor(self.colors['LwM2M'])
         box_plot['boxes'][1].set_facecolor(self.colors['Matter'])
@@ -260,11 +278,12 @@ class ProtocolVisualizationGenerator:
         ax6.grid(True, alpha=0.3)
         
         plt.tight_layout()
-        plt.savefig('comprehensive_protocol_comparison.png', dpi=300, bbox_inches='tight')
-        plt.savefig('comprehensive_protocol_comparison.pdf', bbox_inches='tight')
+        self.savefig('comprehensive_protocol_comparison.png', dpi=300, bbox_inches='tight')
+        self.savefig('comprehensive_protocol_comparison.pdf', bbox_inches='tight')
         print("✅ Comprehensive comparison saved as comprehensive_protocol_comparison.png/.pdf")
         plt.show()
     
+    @profiled_stage(rows=lambda self: len(self.combined_df))
     def create_osi_layer_analysis(self):
         """Create detailed OSI layer analysis visualization"""
         fig, axes = plt.subplots(2, 2, figsize=(16, 12))
@@ -414,11 +433,12 @@ class ProtocolVisualizationGenerator:
         ax4.legend(loc='upper right', bbox_to_anchor=(1.2, 1.0))
         
         plt.tight_layout()
-        plt.savefig('osi_layer_analysis.png', dpi=300, bbox_inches='tight')
-        plt.savefig('osi_layer_analysis.pdf', bbox_inches='tight')
+        self.savefig('osi_layer_analysis.png', dpi=300, bbox_inches='tight')
+        self.savefig('osi_layer_analysis.pdf', bbox_inches='tight')
         print("✅ OSI layer analysis saved as osi_layer_analysis.png/.pdf")
         plt.show()
     
+    @profiled_stage(rows=lambda self: len(self.combined_df))
     def create_research_summary_infographic(self):
         """Create a research summary infographic"""
         fig, ax = plt.subplots(figsize=(16, 10))
@@ -490,11 +510,16 @@ class ProtocolVisualizationGenerator:
         for i, implication in enumerate(implications):
             ax.text(0.5, 1.3 - i*0.3, implication, ha='left', va='center', fontsize=11)
         
-        plt.savefig('research_summary_infographic.png', dpi=300, bbox_inches='tight')
-        plt.savefig('research_summary_infographic.pdf', bbox_inches='tight')
+        self.savefig('research_summary_infographic.png', dpi=300, bbox_inches='tight')
+        self.savefig('research_summary_infographic.pdf', bbox_inches='tight')
         print("✅ Research summary infographic saved as research_summary_infographic.png/.pdf")
         plt.show()
     
+    def savefig(self, filename, **kwargs):
+        """plt.savefig, recorded as its own profiling stage"""
+        with self.profiler.stage(f"savefig:{filename}"):
+            plt.savefig(filename, **kwargs)
+    
     def generate_all_visualizations(self):
         """Generate all visualization types"""
         print("🎨 Generating comprehensive research visualizations...")
@@ -519,8 +544,13 @@ class ProtocolVisualizationGenerator:
         print("\n🎯 Ready for academic publication!")
 
 def main():
-    generator = ProtocolVisualizationGenerator()
+    parser = argparse.ArgumentParser(description="Generate LwM2M vs Matter comparison figures")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    
+    generator = ProtocolVisualizationGenerator(profiler=profiler_from_args(args))
     generator.generate_all_visualizations()
+    generator.profiler.finish(args.profile, args.chrome_trace, args.cprofile)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,173 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is reported as None
+    resource = None
+
+# Written whenever profiling is on and no --profile path was given
+DEFAULT_TRACE_FILE = 'profile_trace.json'
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (a process-wide high-water mark), in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size in MB, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def _difference(end, start):
+    return None if end is None or start is None else end - start
+
+
+class Profiler:
+    """Per-stage wall time, CPU time, RSS and row counts for the analysis pipeline"""
+
+    def __init__(self, enabled=False, cprofile=False):
+        self.enabled = enabled
+        self.records = []
+        self._depth = 0
+        self._origin = time.perf_counter()
+        self._cprofile = cProfile.Profile() if (enabled and cprofile) else None
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time a block; rows may be an int or a zero-argument callable evaluated afterwards"""
+        if not self.enabled:
+            yield
+            return
+
+        self._depth += 1
+        start_rss = current_rss_mb()
+        start_peak = peak_rss_mb()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            end_wall = time.perf_counter()
+            end_cpu = time.process_time()
+            end_rss = current_rss_mb()
+            self._depth -= 1
+            self.records.append({
+                'stage': name,
+                'depth': self._depth,
+                'start_s': start_wall - self._origin,
+                'wall_s': end_wall - start_wall,
+                'cpu_s': end_cpu - start_cpu,
+                'rss_start_mb': start_rss,
+                'rss_end_mb': end_rss,
+                'rss_delta_mb': _difference(end_rss, start_rss),
+                # How far this stage pushed the process-wide peak; 0 if an earlier stage peaked higher
+                'peak_rss_growth_mb': _difference(peak_rss_mb(), start_peak),
+                'rows': rows() if callable(rows) else rows,
+            })
+
+    def summary(self):
+        print("\n" + "="*60)
+        print("⏱️ PIPELINE STAGE PROFILE")
+        print("="*60)
+        for record in sorted(self.records, key=lambda r: r['start_s']):
+            if record['rss_delta_mb'] is not None:
+                rss = f"RSS {record['rss_end_mb']:.0f} MB ({record['rss_delta_mb']:+.1f} MB)"
+            else:
+                rss = "RSS n/a"
+            if record['peak_rss_growth_mb'] is not None:
+                rss += f", peak +{record['peak_rss_growth_mb']:.1f} MB"
+            line = (f"  {'  ' * record['depth']}{record['stage']}: "
+                    f"{record['wall_s'] * 1000:.1f} ms wall, {record['cpu_s'] * 1000:.1f} ms CPU, {rss}")
+            if record['rows'] is not None:
+                line += f", {record['rows']:,} rows"
+            print(line)
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'pid': os.getpid(), 'stages': self.records}, f, indent=2)
+        print(f"✅ Stage trace saved as {path}")
+
+    def write_chrome_trace(self, path):
+        """Trace Event Format, viewable in chrome://tracing or Perfetto"""
+        events = [{
+            'name': record['stage'],
+            'ph': 'X',
+            'ts': record['start_s'] * 1e6,
+            'dur': record['wall_s'] * 1e6,
+            'pid': os.getpid(),
+            'tid': 0,
+            'args': {k: record[k] for k in ('cpu_s', 'rss_end_mb', 'rss_delta_mb',
+                                            'peak_rss_growth_mb', 'rows')},
+        } for record in self.records]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        print(f"✅ Chrome trace saved as {path}")
+
+    def write_cprofile(self, path):
+        if self._cprofile is None:
+            return
+        self._cprofile.disable()
+        self._cprofile.dump_stats(path)
+        print(f"✅ cProfile stats saved as {path}")
+
+    def finish(self, trace_file=None, chrome_trace_file=None, cprofile_file=None):
+        """Print the summary, always write the JSON trace, plus whichever extras were requested"""
+        if not self.enabled:
+            return
+        self.summary()
+        self.write_json(trace_file or DEFAULT_TRACE_FILE)
+        if chrome_trace_file:
+            self.write_chrome_trace(chrome_trace_file)
+        if cprofile_file:
+            self.write_cprofile(cprofile_file)
+
+
+def profiled_stage(name=None, rows=None):
+    """Method decorator recording a stage on self.profiler; rows(self) gives the row count"""
+    def decorator(method):
+        stage_name = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            with profiler.stage(stage_name, rows=(lambda: rows(self)) if rows else None):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_profiling_arguments(parser):
+    """Shared --profile / --chrome-trace / --cprofile command-line flags"""
+    parser.add_argument('--profile', metavar='TRACE_JSON',
+                        help="Record per-stage timings and write them as JSON")
+    parser.add_argument('--chrome-trace', metavar='TRACE_JSON',
+                        help=f"Also write a Chrome trace-event file (implies profiling; "
+                             f"JSON trace defaults to {DEFAULT_TRACE_FILE})")
+    parser.add_argument('--cprofile', metavar='PSTATS',
+                        help=f"Also run cProfile and dump its stats (implies profiling; "
+                             f"JSON trace defaults to {DEFAULT_TRACE_FILE})")
+
+
+def profiler_from_args(args):
+    enabled = bool(args.profile or args.chrome_trace or args.cprofile)
+    return Profiler(enabled=enabled, cprofile=bool(args.cprofile))
@@ -0,0 +1,223 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from header_compression import HeaderCompressionEngine
+from protocol_analyzer import IoTProtocolAnalyzer
+
+SWEEP_MODEL_VERSION = 2
+
+# Transport-layer bytes per network option, on the analyzer's scale:
+# 'none' is LwM2M's UDP-only model, 'ipv6' the 40-byte UDP + IPv6 used for Matter
+TRANSPORT_BYTES = {
+    'none': 8,
+    'ipv4': 20 + 8,
+    'ipv6': 40,
+    'ipv6-iphc': HeaderCompressionEngine('mesh-local').transport_table['Matter'],
+}
+DTLS_RECORD_BYTES = 13 + 8 + 8     # DTLS 1.2 record header + explicit nonce + CCM_8 tag
+OSCORE_BYTES = 5 + 8               # OSCORE option (flags, partial IV, kid) + CCM_8 tag
+TLV_ELEMENT_PAYLOAD_BYTES = 8      # rough payload bytes per TLV element, for tag counting
+
+# What the recorded/simulated overhead columns already assume; transport is
+# taken from each row's TransportOverhead instead
+BASELINE = {
+    'LwM2M': {'dtls': False, 'oscore': False},
+    'Matter': {'mic_bytes': 16, 'tlv_tag_bytes': 1},
+}
+
+# Axes each protocol's overhead actually depends on
+PROTOCOL_AXES = {
+    'LwM2M': ('ip', 'dtls', 'oscore'),
+    'Matter': ('ip', 'mic_bytes', 'tlv_tag_bytes'),
+}
+# Matter always runs over IP, so there is no UDP-only option for it
+PROTOCOL_IP_OPTIONS = {
+    'LwM2M': ('none', 'ipv4', 'ipv6', 'ipv6-iphc'),
+    'Matter': ('ipv4', 'ipv6', 'ipv6-iphc'),
+}
+
+DEFAULT_GRID = {
+    'ip': ['none', 'ipv4', 'ipv6', 'ipv6-iphc'],
+    'dtls': [False, True],
+    'oscore': [False, True],
+    'mic_bytes': [4, 8, 16],
+    'tlv_tag_bytes': [0, 1, 2],
+}
+
+
+def expand_grid(grid):
+    """Every combination of the grid's axes, as a list of parameter dicts"""
+    axes = sorted(grid)
+    return [dict(zip(axes, values)) for values in itertools.product(*(grid[a] for a in axes))]
+
+
+def protocol_grid(grid, protocol):
+    """The part of a grid that applies to one protocol"""
+    sub = {axis: list(grid[axis]) for axis in PROTOCOL_AXES[protocol] if axis in grid}
+    if 'ip' in sub:
+        sub['ip'] = [v for v in sub['ip'] if v in PROTOCOL_IP_OPTIONS[protocol]]
+        if not sub['ip']:
+            del sub['ip']
+    return sub
+
+
+def _point_key(point):
+    return json.dumps(point, sort_keys=True)
+
+
+class ParameterSweepEngine:
+    """Evaluate overhead deltas for a whole message table at every grid point at once"""
+
+    def __init__(self, cache_dir='.sweep_cache', max_cells=20000000):
+        self.cache_dir = cache_dir
+        # Upper bound on (grid points x rows) evaluated per chunk, ~160 MB of float64
+        self.max_cells = max_cells
+
+    def table_fingerprint(self, data):
+        digest = hashlib.sha256(f"v{SWEEP_MODEL_VERSION}".encode())
+        digest.update((data['Protocol'] == 'Matter').to_numpy().tobytes())
+        for column in ['PayloadSize', 'TotalSize', 'TransportOverhead']:
+            digest.update(np.ascontiguousarray(data[column].to_numpy(dtype=np.int64)).tobytes())
+        return digest.hexdigest()[:16]
+
+    def _deltas(self, points, protocol, payload, transport):
+        """(grid points x messages) byte deltas relative to the recorded overhead"""
+        base = BASELINE[protocol]
+
+        def axis(name, default):
+            return np.array([p.get(name, default) for p in points])
+
+        # Without an ip axis every row keeps its recorded transport bytes
+        ip_bytes = np.array([TRANSPORT_BYTES[p['ip']] if 'ip' in p else np.nan for p in points])
+        delta = np.where(np.isnan(ip_bytes)[:, None], 0.0, ip_bytes[:, None] - transport[None, :])
+
+        if protocol == 'LwM2M':
+            dtls = axis('dtls', base['dtls']).astype(int) - int(base['dtls'])
+            oscore = axis('oscore', base['oscore']).astype(int) - int(base['oscore'])
+            delta = delta + (dtls * DTLS_RECORD_BYTES + oscore * OSCORE_BYTES)[:, None]
+        else:
+            mic = axis('mic_bytes', base['mic_bytes']) - base['mic_bytes']
+            tags = axis('tlv_tag_bytes', base['tlv_tag_bytes']) - base['tlv_tag_bytes']
+            elements = 1 + payload // TLV_ELEMENT_PAYLOAD_BYTES
+            delta = delta + mic[:, None] + tags[:, None] * elements[None, :]
+        return delta
+
+    def evaluate(self, data, protocol, points):
+        """Mean size, efficiency and deltas of one protocol at each grid point (no caching)"""
+        subset = data[data['Protocol'] == protocol]
+        payload = subset['PayloadSize'].to_numpy()
+        total = subset['TotalSize'].to_numpy().astype(float)
+        transport = subset['TransportOverhead'].to_numpy().astype(float)
+        n = len(subset)
+        if n == 0:
+            return {}
+
+        delta_sum = np.zeros(len(points))
+        efficiency_sum = np.zeros(len(points))
+        # Chunk the rows so the (points x rows) matrix stays bounded
+        chunk_rows = max(1, self.max_cells // len(points))
+        for start in range(0, n, chunk_rows):
+            p = payload[start:start + chunk_rows]
+            t = total[start:start + chunk_rows]
+            delta = self._deltas(points, protocol, p, transport[start:start + chunk_rows])
+            delta_sum += delta.sum(axis=1)
+            efficiency_sum += (p[None, :] / (t[None, :] + delta) * 100).sum(axis=1)
+
+        base_total = total.mean()
+        base_efficiency = (payload / total * 100).mean()
+        results = {}
+        for point, d, e in zip(points, delta_sum / n, efficiency_sum / n):
+            results[_point_key(point)] = {
+                'TotalSize': base_total + d,
+                'EfficiencyPercent': e,
+                'SizeDelta': d,
+                'EfficiencyDelta': e - base_efficiency,
+            }
+        return results
+
+    def sweep(self, data, grid=None):
+        """Evaluate every grid point, reusing points already memoised on disk for this table
+
+        Each protocol is swept only over the axes that affect it, so there
+        are no duplicate rows for parameters a protocol ignores.
+        """
+        grid = DEFAULT_GRID if grid is None else grid
+        cache_file = os.path.join(self.cache_dir, f"sweep_{self.table_fingerprint(data)}.json")
+
+        cached = {}
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r') as f:
+                cached = json.load(f)
+
+        records = []
+        computed = 0
+        for protocol in ['LwM2M', 'Matter']:
+            if not (data['Protocol'] == protocol).any():
+                continue
+            points = expand_grid(protocol_grid(grid, protocol))
+            protocol_cache = cached.setdefault(protocol, {})
+            missing = [p for p in points if _point_key(p) not in protocol_cache]
+            if missing:
+                protocol_cache.update(self.evaluate(data, protocol, missing))
+                computed += len(missing)
+            for point in points:
+                records.append({'Protocol': protocol, **point, **protocol_cache[_point_key(point)]})
+
+        if computed:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(cached, f)
+            os.replace(tmp_file, cache_file)
+
+        result = pd.DataFrame(records)
+        result.attrs['computed_points'] = computed
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if sweep over protocol overhead parameters")
+    parser.add_argument('--lwm2m', help="Arduino serial output file with LwM2M 'Data:' lines")
+    parser.add_argument('--matter', default="matter_research_data.csv", help="Matter CSV")
+    parser.add_argument('--grid', help="JSON object mapping parameter names to lists of values")
+    parser.add_argument('--cache-dir', default='.sweep_cache')
+    parser.add_argument('--output', default='parameter_sweep.csv')
+    args = parser.parse_args()
+
+    print("🧪 Protocol Parameter Sweep")
+    print("=" * 50)
+
+    analyzer = IoTProtocolAnalyzer()
+    analyzer.load_lwm2m_data(args.lwm2m)
+    analyzer.load_matter_data(args.matter)
+    analyzer.combine_datasets()
+
+    grid = json.loads(args.grid) if args.grid else None
+    start = time.perf_counter()
+    results = ParameterSweepEngine(cache_dir=args.cache_dir).sweep(analyzer.combined_data, grid)
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ {len(results)} grid points in {elapsed:.2f}s "
+          f"({results.attrs['computed_points']} computed, the rest from cache)")
+
+    for protocol, group in results.groupby('Protocol'):
+        axes = [k for k in PROTOCOL_AXES[protocol] if k in group]
+        # Axes from the other protocol leave NaNs behind; restore int/bool values
+        best = group.nsmallest(3, 'TotalSize').astype({k: group[k].dropna().convert_dtypes().dtype
+                                                       for k in axes})
+        print(f"\n  {protocol} - smallest average message ({len(group)} points):")
+        for _, row in best.iterrows():
+            params = ', '.join(f"{k}={row[k]}" for k in axes)
+            print(f"    {row['TotalSize']:.1f} bytes ({row['SizeDelta']:+.1f}), "
+                  f"efficiency {row['EfficiencyPercent']:.1f}% | {params}")
+
+    results.to_csv(args.output, index=False)
+    print(f"\n✅ Sweep results saved as {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import argparse
+import itertools
+import re
+import time
+import numpy as np
+import pandas as pd
+from protocol_analyzer import IoTProtocolAnalyzer, LWM2M_SERIAL_PATTERN
+from quantile_sketch import SketchCollection, save_sketches_next_to
+from retransmission import RetransmissionDetector
+
+SAMPLE_COLUMNS = ['TotalSize', 'EfficiencyPercent']
+Z_95 = 1.959964
+
+
+def iter_serial_chunks(serial_output_file, chunksize=100000):
+    """Stream LwM2M messages out of Arduino serial output, chunksize rows at a time"""
+    pattern = re.compile(LWM2M_SERIAL_PATTERN)
+    columns = ['Timestamp', 'MessageID', 'TotalSize', 'PayloadSize', 'TransportOverhead',
+               'SessionOverhead', 'PresentationOverhead', 'ApplicationOverhead']
+    with open(serial_output_file, 'r') as f:
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                break
+            rows = [m.groups() for m in map(pattern.search, lines) if m]
+            if rows:
+                chunk = pd.DataFrame(np.array(rows, dtype=np.int64), columns=columns)
+                chunk['Protocol'] = 'LwM2M'
+                yield chunk
+
+
+def iter_csv_chunks(csv_file, chunksize=100000):
+    """Stream a message CSV (rs-matter output format) in chunks"""
+    yield from pd.read_csv(csv_file, chunksize=chunksize)
+
+
+def iter_frame_chunks(data, chunksize=100000):
+    """Stream an in-memory message table in chunks"""
+    for start in range(0, len(data), chunksize):
+        yield data.iloc[start:start + chunksize]
+
+
+def interleave(*sources):
+    """Round-robin over chunk sources so every protocol shows up early"""
+    sources = [iter(source) for source in sources]
+    while sources:
+        for source in list(sources):
+            try:
+                yield next(source)
+            except StopIteration:
+                sources.remove(source)
+
+
+class StratifiedReservoir:
+    """Fixed-size uniform reservoir (Algorithm R) per (Protocol, MessageType) stratum"""
+
+    def __init__(self, capacity=2000, seed=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.samples = {}
+        self.seen = {}
+
+    def update(self, chunk):
+        for stratum, group in chunk.groupby(['Protocol', 'MessageType'], sort=False):
+            values = group[SAMPLE_COLUMNS].to_numpy(dtype=float)
+            seen = self.seen.get(stratum, 0)
+            sample = self.samples.get(stratum, np.empty((0, len(SAMPLE_COLUMNS))))
+
+            # Fill the free slots first, then draw replacement slots for the rest
+            free = max(0, self.capacity - len(sample))
+            sample = np.concatenate([sample, values[:free]])
+            rest = values[free:]
+            if len(rest):
+                positions = seen + free + np.arange(1, len(rest) + 1)
+                slots = (self.rng.random(len(rest)) * positions).astype(np.int64)
+                for i in np.flatnonzero(slots < self.capacity):
+                    sample[slots[i]] = rest[i]
+
+            self.samples[stratum] = sample
+            self.seen[stratum] = seen + len(values)
+
+    def estimate(self, protocol, column):
+        """Stratified mean, its standard error, population variance and sample size"""
+        col = SAMPLE_COLUMNS.index(column)
+        strata = [s for s in self.samples if s[0] == protocol]
+        if not strata:
+            return None
+        population = sum(self.seen[s] for s in strata)
+        stats = []
+        for s in strata:
+            values = self.samples[s][:, col]
+            variance = values.var(ddof=1) if len(values) > 1 else np.nan
+            stats.append((self.seen[s] / population, values.mean(), variance, len(values)))
+
+        # A stratum sampled only once has no variance of its own; borrow the pooled one
+        known = [(w, v) for w, _, v, _ in stats if not np.isnan(v)]
+        pooled = sum(w * v for w, v in known) / sum(w for w, _ in known) if known else 0.0
+        stats = [(w, m, pooled if np.isnan(v) else v, n) for w, m, v, n in stats]
+
+        mean = sum(w * m for w, m, _, _ in stats)
+        within = sum(w * v for w, _, v, _ in stats)
+        between = sum(w * (m - mean) ** 2 for w, m, _, _ in stats)
+        # No finite population correction: the rows seen so far are not the whole
+        # capture. The weights are themselves estimated from those rows, which
+        # adds the between-strata term.
+        se_squared = sum(w ** 2 * v / n for w, _, v, n in stats) + between / population
+        sample_size = sum(n for _, _, _, n in stats)
+        return mean, np.sqrt(se_squared), within + between, sample_size
+
+
+class RunningMoments:
+    """Exact per-protocol count / sum / sum of squares, accumulated chunk by chunk"""
+
+    def __init__(self):
+        self.moments = {}
+
+    def update(self, chunk):
+        grouped = chunk.groupby('Protocol')[SAMPLE_COLUMNS]
+        sums = grouped.sum()
+        squares = chunk[SAMPLE_COLUMNS].pow(2).groupby(chunk['Protocol']).sum()
+        counts = grouped.size()
+        for protocol in counts.index:
+            n, s, ss = self.moments.get(protocol, (0, 0.0, 0.0))
+            self.moments[protocol] = (n + counts[protocol],
+                                      s + sums.loc[protocol].to_numpy(),
+                                      ss + squares.loc[protocol].to_numpy())
+
+    def mean_var(self, protocol, column):
+        n, s, ss = self.moments[protocol]
+        col = SAMPLE_COLUMNS.index(column)
+        mean = s[col] / n
+        var = (ss[col] - n * mean ** 2) / (n - 1) if n > 1 else 0.0
+        return mean, var, n
+
+
+class ProgressiveAnalyzer:
+    def __init__(self, capacity=2000, refresh_seconds=1.0, seed=42, dedup='flag'):
+        self.dedup = dedup
+        self.retransmissions = RetransmissionDetector()
+        self.reservoir = StratifiedReservoir(capacity=capacity, seed=seed)
+        self.moments = RunningMoments()
+        self.sketches = SketchCollection()
+        self.refresh_seconds = refresh_seconds
+        self.rows = 0
+
+    def _prepare(self, chunk):
+        if 'EfficiencyPercent' not in chunk.columns:
+            chunk = chunk.assign(EfficiencyPercent=chunk['PayloadSize'] / chunk['TotalSize'] * 100)
+        if 'MessageType' not in chunk.columns:
+            chunk = chunk.assign(MessageType='UNKNOWN')
+        return chunk
+
+    def preliminary_estimates(self):
+        """Sample-based estimates with 95% confidence intervals"""
+        lwm2m_size = self.reservoir.estimate('LwM2M', 'TotalSize')
+        matter_size = self.reservoir.estimate('Matter', 'TotalSize')
+        lwm2m_eff = self.reservoir.estimate('LwM2M', 'EfficiencyPercent')
+        matter_eff = self.reservoir.estimate('Matter', 'EfficiencyPercent')
+        if lwm2m_size is None or matter_size is None:
+            return None
+
+        size_diff = matter_size[0] - lwm2m_size[0]
+        size_se = np.hypot(matter_size[1], lwm2m_size[1])
+        gap = lwm2m_eff[0] - matter_eff[0]
+        gap_se = np.hypot(lwm2m_eff[1], matter_eff[1])
+
+        pooled_std = np.sqrt((lwm2m_size[2] + matter_size[2]) / 2)
+        cohens_d = size_diff / pooled_std if pooled_std > 0 else np.nan
+        # Large-sample standard error of d (Hedges & Olkin, 1985)
+        n1, n2 = lwm2m_size[3], matter_size[3]
+        d_se = np.sqrt((n1 + n2) / (n1 * n2) + cohens_d ** 2 / (2 * (n1 + n2)))
+
+        return {
+            'lwm2m_mean': lwm2m_size[0], 'matter_mean': matter_size[0],
+            'size_difference': size_diff, 'size_difference_ci': Z_95 * size_se,
+            'efficiency_gap': gap, 'efficiency_gap_ci': Z_95 * gap_se,
+            'cohens_d': cohens_d, 'cohens_d_ci': Z_95 * d_se,
+        }
+
+    def exact_results(self):
+        """Exact values from the running moments once every row has been seen"""
+        lwm2m_mean, lwm2m_var, _ = self.moments.mean_var('LwM2M', 'TotalSize')
+        matter_mean, matter_var, _ = self.moments.mean_var('Matter', 'TotalSize')
+        lwm2m_eff = self.moments.mean_var('LwM2M', 'EfficiencyPercent')[0]
+        matter_eff = self.moments.mean_var('Matter', 'EfficiencyPercent')[0]
+        pooled_std = np.sqrt((lwm2m_var + matter_var) / 2)
+        return {
+            'lwm2m_mean': lwm2m_mean, 'matter_mean': matter_mean,
+            'size_difference': matter_mean - lwm2m_mean,
+            'efficiency_gap': lwm2m_eff - matter_eff,
+            'cohens_d': (matter_mean - lwm2m_mean) / pooled_std,
+        }
+
+    def report(self, elapsed):
+        estimates = self.preliminary_estimates()
+        if estimates is None:
+            return
+        print(f"⏱️ {elapsed:5.1f}s | {self.rows:,} rows | "
+              f"Size diff: {estimates['size_difference']:.1f} ± {estimates['size_difference_ci']:.1f} bytes | "
+              f"Efficiency gap: {estimates['efficiency_gap']:.1f} ± {estimates['efficiency_gap_ci']:.1f} pp | "
+              f"Cohen's d: {estimates['cohens_d']:.3f} ± {estimates['cohens_d_ci']:.3f}")
+
+    def run(self, chunks):
+        """Consume chunks, printing refined estimates as they arrive, then the exact values"""
+        start = time.perf_counter()
+        last_report = None
+
+        for chunk in chunks:
+            chunk = self._prepare(chunk)
+            chunk = self.retransmissions.process(chunk, mode=self.dedup)
+            self.reservoir.update(chunk)
+            self.moments.update(chunk)
+            self.sketches.update_frame(chunk)
+            self.rows += len(chunk)
+
+            now = time.perf_counter()
+            if last_report is None or now - last_report >= self.refresh_seconds:
+                if len(self.moments.moments) >= 2:
+                    self.report(now - start)
+                    last_report = now
+
+        elapsed = time.perf_counter() - start
+        missing = [p for p in ['LwM2M', 'Matter'] if p not in self.moments.moments]
+        if missing:
+            # e.g. a serial log without any 'Data:' lines
+            print(f"\n⚠️ No {' or '.join(missing)} messages in the input "
+                  f"({self.rows:,} rows, {elapsed:.1f}s) - skipping the protocol comparison")
+            for protocol in sorted(self.moments.moments):
+                mean, _, n = self.moments.mean_var(protocol, 'TotalSize')
+                print(f"  {protocol} average: {mean:.1f} bytes over {n:,} messages")
+            return None
+
+        results = self.exact_results()
+        print(f"\n✅ EXACT RESULTS ({self.rows:,} rows, {elapsed:.1f}s):")
+        print(f"  LwM2M average: {results['lwm2m_mean']:.1f} bytes")
+        print(f"  Matter average: {results['matter_mean']:.1f} bytes")
+        print(f"  Size difference: {results['size_difference']:.1f} bytes")
+        print(f"  Efficiency gap: {results['efficiency_gap']:.1f} percentage points")
+        print(f"  Effect size (Cohen's d): {results['cohens_d']:.3f}")
+        for protocol in self.sketches.protocols():
+            p50, p90, p99 = self.sketches.get(protocol, 'TotalSize').quantile([0.5, 0.9, 0.99])
+            print(f"  {protocol} size percentiles: P50 {p50:.0f} / P90 {p90:.0f} / P99 {p99:.0f} bytes")
+        for protocol in ['LwM2M', 'Matter']:
+            retx = self.retransmissions.overhead(protocol)
+            print(f"  {protocol} retransmissions: {retx['retransmissions']:,} "
+                  f"({retx['retransmission_overhead_percent']:.1f}% of received bytes)")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate-first LwM2M vs Matter analysis")
+    parser.add_argument('--lwm2m', help="Arduino serial output file with LwM2M 'Data:' lines")
+    parser.add_argument('--matter', help="Matter CSV (rs-matter output format)")
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--capacity', type=int, default=2000,
+                        help="Reservoir size per (Protocol, MessageType) stratum")
+    parser.add_argument('--refresh', type=float, default=1.0,
+                        help="Seconds between preliminary reports")
+    parser.add_argument('--dedup', choices=['drop', 'flag'], default='flag',
+                        help="Drop or only flag retransmitted messages")
+    parser.add_argument('--save-sketches', action='store_true',
+                        help="Write <data file>.sketch.json next to each input file")
+    args = parser.parse_args()
+
+    print("🔬 IoT Protocol Research Analyzer (progressive mode)")
+    print("=" * 50)
+
+    # Fall back to the simulated datasets when no capture is given
+    fallback = IoTProtocolAnalyzer()
+    if args.lwm2m:
+        lwm2m_chunks = iter_serial_chunks(args.lwm2m, args.chunksize)
+    else:
+        fallback.create_simulated_lwm2m_data()
+        lwm2m_chunks = iter_frame_chunks(fallback.lwm2m_data, args.chunksize)
+    if args.matter:
+        matter_chunks = iter_csv_chunks(args.matter, args.chunksize)
+    else:
+        fallback.create_simulated_matter_data()
+        matter_chunks = iter_frame_chunks(fallback.matter_data, args.chunksize)
+
+    analyzer = ProgressiveAnalyzer(capacity=args.capacity, refresh_seconds=args.refresh,
+                                   dedup=args.dedup)
+    analyzer.run(interleave(lwm2m_chunks, matter_chunks))
+
+    # Leave sketches next to each capture so later runs can merge them without re-reading
+    if args.save_sketches:
+        for protocol, data_file in [('LwM2M', args.lwm2m), ('Matter', args.matter)]:
+            if data_file:
+                save_sketches_next_to(analyzer.sketches, protocol, data_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,40 @@
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 import warnings
+from header_compression import HeaderCompressionEngine
+from quantile_sketch import SketchCollection, save_sketches_next_to
+from session_resumption import SessionResumptionModel
+from retransmission import RetransmissionDetector
+from instrumentation import Profiler, profiled_stage, add_profiling_arguments, profiler_from_args
 warnings.filterwarnings('ignore')
 
+# Arduino serial output line: Data: <timestamp>,LwM2M,<id>,<total>,<payload>,<L4>,<L5>,<L6>,<L7>
+LWM2M_SERIAL_PATTERN = r'Data: (\d+),LwM2M,(\d+),(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)'
+
+def _row_count(*attributes):
+    """Row counter for profiled stages: total length of the named DataFrame attributes"""
+    return lambda self: sum(len(getattr(self, a)) for a in attributes if getattr(self, a) is not None)
+
 class IoTProtocolAnalyzer:
-    def __init__(self):
+    def __init__(self, profiler=None, dedup='flag'):
+        self.profiler = profiler or Profiler()
+        # 'flag' marks CoAP/MRP retransmissions while loading, 'drop' removes them
+        self.dedup = dedup
+        self.retransmissions = RetransmissionDetector()
         self.lwm2m_data = None
         self.matter_data = None
         self.combined_data = None
+        self.sketches = SketchCollection()
+        self.data_files = {}   # protocol -> file its rows were loaded from
         
+    @profiled_stage(rows=_row_count('lwm2m_data'))
     def load_lwm2m_data(self, serial_output_file=None):
         """Extract LwM2M data from Arduino serial output or manual CSV"""
+        loaded_from_file = False
         if serial_output_file:
             # Parse Arduino serial output
             lwm2m_messages = []
@@ -22,8 +43,7 @@ class IoTProtocolAnalyzer:
                     content = f.read()
                     # Extract CSV-like data from serial output
                     import re
-                    pattern = r'Data: (\d+),LwM2M,(\d+),(\d+),(\d+),(\d+),(\d+),(\d+),(\d+)'
-                    matches = re.findall(pattern, content)
+                    matches = re.findall(LWM2M_SERIAL_PATTERN, content)
                     
                     for match in matches:
                         lwm2m_messages.append({
@@ -40,6 +60,7 @@ class IoTProtocolAnalyzer:
                 
                 self.lwm2m_data = pd.DataFrame(lwm2m_messages)
                 print(f"✅ Loaded {len(self.lwm2m_data)} LwM2M messages from serial output")
+                loaded_from_file = True
                 
             except FileNotFoundError:
                 print("⚠️ Serial output file not found, using simulated LwM2M data")
@@ -53,112 +74,135 @@ class IoTProtocolAnalyzer:
                 self.lwm2m_data['PayloadSize'] / self.lwm2m_data['TotalSize'] * 100
             )
             self.lwm2m_data['OverheadPercent'] = 100 - self.lwm2m_data['EfficiencyPercent']
+        
+        self.retransmissions.reset('LwM2M')
+        self.lwm2m_data = self.retransmissions.process(self.lwm2m_data, mode=self.dedup)
+        self._report_retransmissions('LwM2M')
+        self.sketches.discard('LwM2M')
+        self.sketches.update_frame(self.lwm2m_data)
+        self._track_data_file('LwM2M', serial_output_file if loaded_from_file else None)
             
-    def create_simulated_lwm2m_data(self):
+    def create_simulated_lwm2m_data(self, n_messages=50):
         """Create realistic LwM2M data based on your actual readings"""
         np.random.seed(42)
-        n_messages = 50
         
         # Based on your actual data: 150611,LwM2M,6,45,2,8,12,15,8
-        lwm2m_messages = []
-        
-        for i in range(n_messages):
-            # Vary payload size based on message type
-            if i % 4 == 0:  # Registration messages (larger)
-                payload_size = np.random.randint(80, 150)
-            elif i % 4 == 1:  # Temperature readings (small)
-                payload_size = np.random.randint(1, 8)  
-            elif i % 4 == 2:  # Battery readings (small)
-                payload_size = np.random.randint(1, 4)
-            else:  # Device info (medium)
-                payload_size = np.random.randint(20, 50)
-            
-            # Real LwM2M overhead (from your actual implementation)
-            transport = 8   # UDP header
-            session = 12    # CoAP header
-            presentation = 15  # CoAP options
-            application = 8    # LwM2M metadata
-            
-            total_size = payload_size + transport + session + presentation + application
-            
-            lwm2m_messages.append({
-                'Timestamp': 30000 + (i * 30000),  # Every 30 seconds
-                'Protocol': 'LwM2M',
-                'MessageID': i + 1,
-                'MessageType': ['REGISTRATION', 'TEMPERATURE', 'BATTERY', 'DEVICE'][i % 4],
-                'PayloadSize': payload_size,
-                'TotalSize': total_size,
-                'TransportOverhead': transport,
-                'SessionOverhead': session,
-                'PresentationOverhead': presentation,
-                'ApplicationOverhead': application,
-                'EfficiencyPercent': (payload_size / total_size) * 100,
-                'OverheadPercent': ((total_size - payload_size) / total_size) * 100
-            })
-        
-        self.lwm2m_data = pd.DataFrame(lwm2m_messages)
+        # Payload size varies with message type, cycling through the four types:
+        # registration (larger), temperature / battery (small), device info (medium)
+        message_types = np.array(['REGISTRATION', 'TEMPERATURE', 'BATTERY', 'DEVICE'])
+        payload_low = np.array([80, 1, 1, 20])
+        payload_high = np.array([150, 8, 4, 50])
+        
+        i = np.arange(n_messages)
+        type_index = i % 4
+        # One vectorized draw consumes the generator exactly like per-message calls
+        payload_size = np.random.randint(payload_low[type_index], payload_high[type_index])
+        
+        # Real LwM2M overhead (from your actual implementation)
+        transport = 8   # UDP header
+        session = 12    # CoAP header
+        presentation = 15  # CoAP options
+        application = 8    # LwM2M metadata
+        
+        total_size = payload_size + transport + session + presentation + application
+        
+        self.lwm2m_data = pd.DataFrame({
+            'Timestamp': 30000 + (i * 30000),  # Every 30 seconds
+            'Protocol': 'LwM2M',
+            'MessageID': i + 1,
+            'MessageType': message_types[type_index],
+            'PayloadSize': payload_size,
+            'TotalSize': total_size,
+            'TransportOverhead': transport,
+            'SessionOverhead': session,
+            'PresentationOverhead': presentation,
+            'ApplicationOverhead': application,
+            'EfficiencyPercent': (payload_size / total_size) * 100,
+            'OverheadPercent': ((total_size - payload_size) / total_size) * 100
+        })
         print(f"✅ Created {len(self.lwm2m_data)} simulated LwM2M messages")
     
+    @profiled_stage(rows=_row_count('matter_data'))
     def load_matter_data(self, csv_file="matter_research_data.csv"):
         """Load Matter data from rs-matter CSV output"""
+        loaded_from_file = False
         try:
             self.matter_data = pd.read_csv(csv_file)
             print(f"✅ Loaded {len(self.matter_data)} Matter messages from {csv_file}")
+            loaded_from_file = True
         except FileNotFoundError:
             print("⚠️ Matter CSV not found, creating simulated data")
             self.create_simulated_matter_data()
+        
+        self.retransmissions.reset('Matter')
+        self.matter_data = self.retransmissions.process(self.matter_data, mode=self.dedup)
+        self._report_retransmissions('Matter')
+        self.sketches.discard('Matter')
+        self.sketches.update_frame(self.matter_data)
+        self._track_data_file('Matter', csv_file if loaded_from_file else None)
+    
+    def _report_retransmissions(self, protocol):
+        """Say at load time how many rows deduplication removed or marked"""
+        retx = self.retransmissions.overhead(protocol)
+        if self.dedup == 'drop':
+            print(f"🔁 Dropped {retx['retransmissions']} of {retx['messages']} {protocol} messages "
+                  f"as retransmissions (--dedup flag keeps them)")
+        else:
+            print(f"🔁 Flagged {retx['retransmissions']} of {retx['messages']} {protocol} messages "
+                  f"as retransmissions (--dedup drop removes them)")
+    
+    def _track_data_file(self, protocol, data_file):
+        if data_file:
+            self.data_files[protocol] = data_file
+        else:
+            self.data_files.pop(protocol, None)
     
-    def create_simulated_matter_data(self):
+    def save_sketches(self):
+        """Persist each loaded file's quantile sketches next to it, for quantile_sketch.py to merge"""
+        if not self.data_files:
+            print("⚠️ No data files loaded (simulated data only), no sketches saved")
+        return [save_sketches_next_to(self.sketches, protocol, data_file)
+                for protocol, data_file in self.data_files.items()]
+    
+    def create_simulated_matter_data(self, n_messages=50):
         """Create realistic Matter data based on rs-matter specs"""
         np.random.seed(43)
-        n_messages = 50
         
-        matter_messages = []
+        # Matter message types with different payload sizes
+        message_types = np.array(['COMMISSIONING', 'ON_COMMAND', 'OFF_COMMAND', 
+                                  'TEMPERATURE_READ', 'LEVEL_CONTROL', 'DEVICE_INFO'])
+        payload_low = np.array([40, 3, 3, 4, 6, 25])
+        payload_high = np.array([80, 8, 8, 12, 15, 60])
         
-        for i in range(n_messages):
-            # Matter message types with different payload sizes
-            message_types = ['COMMISSIONING', 'ON_COMMAND', 'OFF_COMMAND', 
-                           'TEMPERATURE_READ', 'LEVEL_CONTROL', 'DEVICE_INFO']
-            msg_type = message_types[i % len(message_types)]
-            
-            # Payload sizes based on message type
-            if msg_type == 'COMMISSIONING':
-                payload_size = np.random.randint(40, 80)
-            elif msg_type in ['ON_COMMAND', 'OFF_COMMAND']:
-                payload_size = np.random.randint(3, 8)
-            elif msg_type == 'TEMPERATURE_READ':
-                payload_size = np.random.randint(4, 12)
-            elif msg_type == 'LEVEL_CONTROL':
-                payload_size = np.random.randint(6, 15)
-            else:  # DEVICE_INFO
-                payload_size = np.random.randint(25, 60)
-            
-            # Real Matter overhead (authentic values)
-            transport = 40      # UDP + IPv6
-            session = 35        # Matter session + PASE/CASE
-            presentation = max(8, payload_size // 10 + 3)  # TLV encoding
-            application = 25    # Matter clusters + metadata
-            
-            total_size = payload_size + transport + session + presentation + application
-            
-            matter_messages.append({
-                'Timestamp': 30000 + (i * 15000),  # Every 15 seconds
-                'Protocol': 'Matter',
-                'MessageID': i + 1,
-                'MessageType': msg_type,
-                'PayloadSize': payload_size,
-                'TotalSize': total_size,
-                'TransportOverhead': transport,
-                'SessionOverhead': session,
-                'PresentationOverhead': presentation,
-                'ApplicationOverhead': application,
-                'EfficiencyPercent': (payload_size / total_size) * 100,
-                'OverheadPercent': ((total_size - payload_size) / total_size) * 100
-            })
-        
-        self.matter_data = pd.DataFrame(matter_messages)
+        i = np.arange(n_messages)
+        type_index = i % len(message_types)
+        payload_size = np.random.randint(payload_low[type_index], payload_high[type_index])
+        
+        # Real Matter overhead (authentic values)
+        transport = 40      # UDP + IPv6
+        session = 35        # Matter session + PASE/CASE
+        presentation = np.maximum(8, payload_size // 10 + 3)  # TLV encoding
+        application = 25    # Matter clusters + metadata
+        
+        total_size = payload_size + transport + session + presentation + application
+        
+        self.matter_data = pd.DataFrame({
+            'Timestamp': 30000 + (i * 15000),  # Every 15 seconds
+            'Protocol': 'Matter',
+            'MessageID': i + 1,
+            'MessageType': message_types[type_index],
+            'PayloadSize': payload_size,
+            'TotalSize': total_size,
+            'TransportOverhead': transport,
+            'SessionOverhead': session,
+            'PresentationOverhead': presentation,
+            'ApplicationOverhead': application,
+            'EfficiencyPercent': (payload_size / total_size) * 100,
+            'OverheadPercent': ((total_size - payload_size) / total_size) * 100
+        })
         print(f"✅ Created {len(self.matter_data)} simulated Matter messages")
     
+    @profiled_stage(rows=_row_count('combined_data'))
     def combine_datasets(self):
         """Combine LwM2M and Matter data for comparison"""
         if self.lwm2m_data is not None and self.matter_data is not None:
@@ -166,6 +210,7 @@ class IoTProtocolAnalyzer:
                                          ignore_index=True)
             print(f"✅ Combined datasets: {len(self.combined_data)} total messages")
     
+    @profiled_stage(rows=_row_count('lwm2m_data', 'matter_data'))
     def perform_statistical_analysis(self):
         """Perform comprehensive statistical analysis"""
         if self.combined_data is None:
@@ -191,6 +236,12 @@ class IoTProtocolAnalyzer:
         print(f"  Average Efficiency: {matter_stats.loc['mean', 'EfficiencyPercent']:.1f}%")
         print(f"  Message Size Range: {matter_stats.loc['min', 'TotalSize']:.0f} - {matter_stats.loc['max', 'TotalSize']:.0f} bytes")
         
+        # Percentiles from the streaming sketches (no raw rows needed)
+        print("\n📏 MESSAGE SIZE PERCENTILES:")
+        for protocol in self.sketches.protocols():
+            p50, p90, p99 = self.sketches.get(protocol, 'TotalSize').quantile([0.5, 0.9, 0.99])
+            print(f"  {protocol}: P50 {p50:.0f} / P90 {p90:.0f} / P99 {p99:.0f} bytes")
+        
         # Comparative analysis
         lwm2m_avg_size = self.lwm2m_data['TotalSize'].mean()
         matter_avg_size = self.matter_data['TotalSize'].mean()
@@ -235,7 +286,16 @@ class IoTProtocolAnalyzer:
             print(f"    Session (L5): {data['SessionOverhead'].mean():.1f} bytes ({data['SessionOverhead'].mean()/total_avg*100:.1f}%)")
             print(f"    Presentation (L6): {data['PresentationOverhead'].mean():.1f} bytes ({data['PresentationOverhead'].mean()/total_avg*100:.1f}%)")
             print(f"    Application (L7): {data['ApplicationOverhead'].mean():.1f} bytes ({data['ApplicationOverhead'].mean()/total_avg*100:.1f}%)")
+        
+        # Retransmission overhead (CoAP CON retries / Matter MRP)
+        print(f"\n🔁 RETRANSMISSION OVERHEAD:")
+        for protocol in ['LwM2M', 'Matter']:
+            retx = self.retransmissions.overhead(protocol)
+            action = "dropped" if self.dedup == 'drop' else "flagged"
+            print(f"  {protocol}: {retx['retransmissions']} of {retx['messages']} messages {action}, "
+                  f"{retx['retransmitted_bytes']} bytes ({retx['retransmission_overhead_percent']:.1f}% of received bytes)")
     
+    @profiled_stage(rows=_row_count('lwm2m_data', 'matter_data'))
     def analyze_efficiency_by_payload_size(self):
         """Analyze how efficiency varies with payload size"""
         print("\n" + "="*60)
@@ -257,6 +317,61 @@ class IoTProtocolAnalyzer:
                 if not pd.isna(efficiency):
                     print(f"  {bin_name}: {efficiency:.1f}%")
     
+    @profiled_stage(rows=_row_count('combined_data'))
+    def analyze_header_compression(self, iphc_profile='mesh-local'):
+        """Estimate on-air sizes with 6LoWPAN IPHC / SCHC header compression"""
+        if self.combined_data is None:
+            self.combine_datasets()
+        
+        print("\n" + "="*60)
+        print("🗜️ HEADER COMPRESSION WHAT-IF (6LoWPAN IPHC / SCHC)")
+        print("="*60)
+        
+        engine = HeaderCompressionEngine(iphc_profile=iphc_profile)
+        self.combined_data = engine.apply(self.combined_data)
+        summary = engine.summarize(self.combined_data)
+        
+        print(f"\n  IPHC address profile: {iphc_profile}")
+        for protocol, row in summary.iterrows():
+            print(f"\n  {protocol.upper()}:")
+            print(f"    Transport (L4): {row['TransportOverhead']:.1f} -> {row['TransportOverheadCompressed']:.1f} bytes")
+            print(f"    Session (L5): {row['SessionOverhead']:.1f} -> {row['SessionOverheadCompressed']:.1f} bytes")
+            print(f"    Average Message Size: {row['TotalSize']:.1f} -> {row['TotalSizeCompressed']:.1f} bytes")
+            print(f"    Average Efficiency: {row['EfficiencyPercent']:.1f}% -> {row['EfficiencyPercentCompressed']:.1f}%")
+        
+        return summary
+    
+    @profiled_stage(rows=_row_count('matter_data'))
+    def analyze_session_resumption(self, hit_rate=0.9, messages_per_session=20,
+                                   fleet_size=100000, reconnects_per_day=24):
+        """Account for CASE handshake bytes with resumption; returns (augmented Matter rows, fleet savings)"""
+        print("\n" + "="*60)
+        print("🔁 SESSION RESUMPTION ANALYSIS (CASE)")
+        print("="*60)
+        
+        model = SessionResumptionModel(hit_rate=hit_rate, messages_per_session=messages_per_session)
+        baseline = SessionResumptionModel(hit_rate=0.0, messages_per_session=messages_per_session)
+        with_resumption = model.apply(self.matter_data)
+        without = baseline.apply(self.matter_data)
+        
+        print(f"\n  Cache hit rate: {hit_rate*100:.0f}%, {messages_per_session} messages per session")
+        print(f"  Handshake per reconnect: {baseline.handshake_bytes():.0f} -> {model.handshake_bytes():.0f} bytes")
+        print(f"  Session overhead incl. handshake: "
+              f"{without['SessionOverheadWithHandshake'].mean():.1f} -> "
+              f"{with_resumption['SessionOverheadWithHandshake'].mean():.1f} bytes/message")
+        print(f"  Matter efficiency incl. handshake: "
+              f"{without['EfficiencyPercentWithHandshake'].mean():.1f}% -> "
+              f"{with_resumption['EfficiencyPercentWithHandshake'].mean():.1f}%")
+        print(f"  Reconnect latency: {baseline.reconnect_latency_ms():.0f} -> {model.reconnect_latency_ms():.0f} ms")
+        
+        savings = model.fleet_savings(fleet_size, reconnects_per_day)
+        print(f"\n  Fleet of {fleet_size:,} devices, {reconnects_per_day} reconnects/day each:")
+        print(f"    Handshake traffic saved: {savings['handshake_bytes_saved_per_day']/1e6:.1f} MB/day")
+        print(f"    Reconnect time saved: {savings['device_hours_saved_per_day']:.1f} device-hours/day")
+        
+        return with_resumption, savings
+    
+    @profiled_stage(rows=_row_count('lwm2m_data', 'matter_data'))
     def generate_research_summary(self):
         """Generate a comprehensive research summary"""
         print("\n" + "="*60)
@@ -302,10 +417,20 @@ class IoTProtocolAnalyzer:
 """)
 
 def main():
+    parser = argparse.ArgumentParser(description="LwM2M vs Matter protocol overhead analysis")
+    parser.add_argument('--dedup', choices=['drop', 'flag'], default='flag',
+                        help="Drop or only flag retransmitted messages while loading")
+    parser.add_argument('--session-hit-rate', type=float, default=0.9,
+                        help="CASE session resumption cache hit rate (e.g. from the test server)")
+    parser.add_argument('--save-sketches', action='store_true',
+                        help="Write <data file>.sketch.json next to each loaded capture")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    
     print("🔬 IoT Protocol Research Analyzer")
     print("=" * 50)
     
-    analyzer = IoTProtocolAnalyzer()
+    analyzer = IoTProtocolAnalyzer(profiler=profiler_from_args(args), dedup=args.dedup)
     
     # Load data (try to load real data, fallback to simulated)
     print("\n📥 Loading LwM2M data...")
@@ -314,6 +439,9 @@ def main():
     print("\n📥 Loading Matter data...")
     analyzer.load_matter_data()  # Will try to load from CSV, fallback to simulated
     
+    if args.save_sketches:
+        analyzer.save_sketches()
+    
     # Perform comprehensive analysis
     print("\n🔍 Performing statistical analysis...")
     analyzer.perform_statistical_analysis()
@@ -321,9 +449,17 @@ def main():
     print("\n⚡ Analyzing efficiency patterns...")
     analyzer.analyze_efficiency_by_payload_size()
     
+    print("\n🗜️ Estimating header compression savings...")
+    analyzer.analyze_header_compression()
+    
+    print("\n🔁 Modelling session resumption...")
+    analyzer.analyze_session_resumption(hit_rate=args.session_hit_rate)
+    
     print("\n📋 Generating research summary...")
     analyzer.generate_research_summary()
     
+    analyzer.profiler.finish(args.profile, args.chrome_trace, args.cprofile)
+    
     print("\n✅ Analysis completed! Use create_visualizations.py for charts.")
 
 if __name__ == "__main__":
@@ -0,0 +1,261 @@
+import argparse
+import json
+import random
+import numpy as np
+
+SKETCH_COLUMNS = ['TotalSize', 'PayloadSize', 'TransportOverhead', 'SessionOverhead',
+                  'PresentationOverhead', 'ApplicationOverhead', 'EfficiencyPercent']
+
+
+class QuantileSketch:
+    """Mergeable KLL quantile sketch (Karnin, Lang & Liberty, 2016)"""
+
+    def __init__(self, k=200, c=2.0 / 3.0, seed=None):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.min = None
+        self.max = None
+        self.compactors = [np.empty(0)]
+        self._rng = random.Random(seed)
+
+    def capacity(self, level):
+        height = len(self.compactors)
+        return 2 + int(self.k * self.c ** (height - level - 1))
+
+    def _size(self):
+        return sum(len(items) for items in self.compactors)
+
+    def _max_size(self):
+        return sum(self.capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value):
+        self.update_many([value])
+
+    def update_many(self, values):
+        """Add a batch of values; cost is amortised over the whole batch"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        lo, hi = values.min(), values.max()
+        self.min = float(lo) if self.min is None else min(self.min, float(lo))
+        self.max = float(hi) if self.max is None else max(self.max, float(hi))
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for h in range(len(self.compactors)):
+                if len(self.compactors[h]) >= self.capacity(h):
+                    if h + 1 >= len(self.compactors):
+                        self.compactors.append(np.empty(0))
+                    items = np.sort(self.compactors[h])
+                    # An odd item out stays behind so total weight is preserved
+                    keep = items[-1:] if len(items) % 2 else items[:0]
+                    items = items[:len(items) - len(keep)]
+                    promoted = items[self._rng.randint(0, 1)::2]
+                    self.compactors[h] = keep
+                    self.compactors[h + 1] = np.concatenate([self.compactors[h + 1], promoted])
+                    break
+
+    def merge(self, other):
+        """Fold another sketch into this one (in place) and return self"""
+        if other.n == 0:
+            return self
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append(np.empty(0))
+        for h, items in enumerate(other.compactors):
+            self.compactors[h] = np.concatenate([self.compactors[h], items])
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        values = np.concatenate(self.compactors)
+        weights = np.concatenate([np.full(len(items), 2 ** h, dtype=float)
+                                  for h, items in enumerate(self.compactors)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def cdf(self, x):
+        """Approximate fraction of values <= x"""
+        if self.n == 0:
+            return np.full(np.shape(x), np.nan)
+        values, cumulative = self._weighted_items()
+        if len(self.compactors) == 1:
+            # Nothing compacted yet, so the sketch still holds the exact values
+            return np.searchsorted(values, x, side='right') / cumulative[-1]
+        # Each retained item stands for 2**h values centred on it, so the rank
+        # is interpolated between item midpoints and the exact min/max
+        weights = np.diff(cumulative, prepend=0.0)
+        xs = np.concatenate([[self.min], values, [self.max]])
+        ys = np.concatenate([[0.0], cumulative - weights / 2, [cumulative[-1]]])
+        return np.interp(x, xs, ys) / cumulative[-1]
+
+    def quantile(self, q):
+        """Approximate value at quantile q (scalar or array, 0-1)"""
+        if self.n == 0:
+            return np.nan
+        values, cumulative = self._weighted_items()
+        q = np.asarray(q, dtype=float)
+        targets = q * cumulative[-1]
+        idx = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(values) - 1)
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, values[idx]))
+        return float(result) if result.ndim == 0 else result
+
+    def box_stats(self, label=None, whis=1.5):
+        """Box plot statistics in the format accepted by Axes.bxp"""
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        values = np.concatenate(self.compactors + [np.array([self.min, self.max])])
+        inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+        whislo, whishi = inside.min(), inside.max()
+        fliers = np.unique(values[(values < whislo) | (values > whishi)])
+        return {'label': label, 'med': med, 'q1': q1, 'q3': q3,
+                'whislo': whislo, 'whishi': whishi, 'fliers': fliers}
+
+    def histogram(self, bins=15, density=False):
+        """Approximate histogram counts and bin edges, like np.histogram"""
+        if np.ndim(bins) == 0:
+            bins = np.linspace(self.min, self.max, int(bins) + 1)
+        edges = np.asarray(bins, dtype=float)
+        if len(self.compactors) == 1:
+            # Exact values: half-open bins with a closed last bin, as np.histogram does
+            values = np.sort(self.compactors[0])
+            below = np.searchsorted(values, edges, side='left').astype(float)
+            below[-1] = np.searchsorted(values, edges[-1], side='right')
+            counts = np.diff(below)
+        else:
+            counts = np.diff(self.cdf(edges)) * self.n
+        if density:
+            counts = counts / (counts.sum() * np.diff(edges))
+        return counts, edges
+
+    def to_dict(self):
+        return {
+            'k': self.k,
+            'c': self.c,
+            'n': self.n,
+            'min': self.min,
+            'max': self.max,
+            'compactors': [items.tolist() for items in self.compactors],
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(k=state['k'], c=state['c'])
+        sketch.n = state['n']
+        sketch.min = state['min']
+        sketch.max = state['max']
+        sketch.compactors = [np.asarray(items, dtype=float) for items in state['compactors']]
+        return sketch
+
+
+class SketchCollection:
+    """One QuantileSketch per (protocol, column), mergeable across files and workers"""
+
+    def __init__(self, k=200, columns=None):
+        self.k = k
+        self.columns = SKETCH_COLUMNS if columns is None else columns
+        self.sketches = {}
+
+    def get(self, protocol, column='TotalSize'):
+        key = (protocol, column)
+        if key not in self.sketches:
+            self.sketches[key] = QuantileSketch(k=self.k)
+        return self.sketches[key]
+
+    def update_frame(self, data):
+        """Stream a message table (or one chunk of it) into the sketches"""
+        if data is None or len(data) == 0:
+            return
+        for protocol, group in data.groupby('Protocol'):
+            for column in self.columns:
+                if column in group.columns:
+                    self.get(protocol, column).update_many(group[column].to_numpy())
+
+    def discard(self, protocol):
+        """Drop every sketch of one protocol, e.g. before reloading its data"""
+        for key in [key for key in self.sketches if key[0] == protocol]:
+            del self.sketches[key]
+
+    def merge(self, other):
+        for (protocol, column), sketch in other.sketches.items():
+            self.get(protocol, column).merge(sketch)
+        return self
+
+    def protocols(self):
+        return sorted({protocol for protocol, _ in self.sketches})
+
+    def save(self, path, protocols=None):
+        """Write the sketches (optionally only some protocols') as JSON"""
+        state = {
+            'k': self.k,
+            'columns': self.columns,
+            'sketches': [{'protocol': protocol, 'column': column, 'sketch': sketch.to_dict()}
+                         for (protocol, column), sketch in self.sketches.items()
+                         if protocols is None or protocol in protocols],
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            state = json.load(f)
+        collection = cls(k=state['k'], columns=state['columns'])
+        for entry in state['sketches']:
+            key = (entry['protocol'], entry['column'])
+            collection.sketches[key] = QuantileSketch.from_dict(entry['sketch'])
+        return collection
+
+
+def sketch_path_for(data_file):
+    """Location of the sketch file cached next to a data file"""
+    return f"{data_file}.sketch.json"
+
+
+def save_sketches_next_to(collection, protocol, data_file):
+    """Write one protocol's sketches beside its data file; warns instead of failing"""
+    path = sketch_path_for(data_file)
+    try:
+        collection.save(path, protocols=[protocol])
+    except OSError as e:
+        print(f"⚠️ Could not save {protocol} sketches to {path}: {e}")
+        return None
+    print(f"✅ Saved {protocol} quantile sketches to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Merge sketch files from several captures or workers into fleet-wide percentiles")
+    parser.add_argument('sketch_files', nargs='+', help="*.sketch.json files written by the loaders")
+    parser.add_argument('--output', help="Save the merged sketches to this file")
+    args = parser.parse_args()
+
+    print("📏 Fleet-wide Message Size Percentiles")
+    print("=" * 50)
+
+    merged = SketchCollection.load(args.sketch_files[0])
+    for path in args.sketch_files[1:]:
+        merged.merge(SketchCollection.load(path))
+    print(f"✅ Merged {len(args.sketch_files)} sketch files")
+
+    for protocol in merged.protocols():
+        sketch = merged.get(protocol, 'TotalSize')
+        p50, p90, p99 = sketch.quantile([0.5, 0.9, 0.99])
+        print(f"  {protocol}: {sketch.n:,} messages | P50 {p50:.0f} / P90 {p90:.0f} / "
+              f"P99 {p99:.0f} bytes | range {sketch.min:.0f} - {sketch.max:.0f}")
+
+    if args.output:
+        merged.save(args.output)
+        print(f"✅ Merged sketches saved as {args.output}")
+
+
+if __name__ == "__main__":
+    main()
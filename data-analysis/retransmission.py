@@ -0,0 +1,107 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# CoAP EXCHANGE_LIFETIME is ~247 s; Matter MRP gives up well within that
+DEFAULT_WINDOW_MS = 247000
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_DEVICE = 'default'
+
+
+class RetransmissionDetector:
+    """Flags repeated MessageIDs (CoAP CON retries, Matter MRP retransmissions) while ingesting
+
+    A message is a retransmission when the same (device, protocol, MessageID)
+    with the same TotalSize / PayloadSize was already seen in the current or
+    previous time window. The sizes matter: a retry repeats the same bytes, but
+    the Arduino client logs several objects of one update under a single
+    MessageID, and the serial log carries no device or object column. Each
+    (device, protocol) keeps an LRU of at most max_entries IDs (a repeat
+    refreshes its entry), so memory stays constant per device however long
+    the capture is.
+    """
+
+    def __init__(self, window_ms=DEFAULT_WINDOW_MS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.window_ms = window_ms
+        self.max_entries = max_entries
+        self._seen = {}    # (device, protocol) -> OrderedDict of (MessageID, window) keys
+        self.stats = {}    # protocol -> [messages, retransmissions, bytes, retransmitted bytes]
+
+    def reset(self, protocol=None):
+        """Forget state and statistics, for one protocol or all of them"""
+        if protocol is None:
+            self._seen.clear()
+            self.stats.clear()
+            return
+        for key in [key for key in self._seen if key[1] == protocol]:
+            del self._seen[key]
+        self.stats.pop(protocol, None)
+
+    def process(self, data, mode='flag'):
+        """Flag ('flag') or remove ('drop') retransmissions in a message table or chunk"""
+        if mode not in ('flag', 'drop'):
+            raise ValueError("mode must be 'flag' or 'drop'")
+        if data is None or len(data) == 0 or 'MessageID' not in data.columns:
+            return data
+
+        devices = (data['DeviceID'].tolist() if 'DeviceID' in data.columns
+                   else [DEFAULT_DEVICE] * len(data))
+        protocols = data['Protocol'].tolist()
+        # A retransmission carries the same bytes, so the sizes are part of the key
+        message_ids = list(zip(*(data[c].tolist() if c in data.columns else [None] * len(data)
+                                 for c in ('MessageID', 'TotalSize', 'PayloadSize'))))
+        windows = ((data['Timestamp'] // self.window_ms).tolist() if 'Timestamp' in data.columns
+                   else [0] * len(data))
+
+        flags = np.zeros(len(data), dtype=bool)
+        seen = self._seen
+        max_entries = self.max_entries
+        for i, (device, protocol, message_id, window) in enumerate(
+                zip(devices, protocols, message_ids, windows)):
+            index = seen.get((device, protocol))
+            if index is None:
+                index = seen[(device, protocol)] = OrderedDict()
+            if (message_id, window) in index:
+                flags[i] = True
+                index.move_to_end((message_id, window))
+                continue
+            if (message_id, window - 1) in index:
+                flags[i] = True
+                index.move_to_end((message_id, window - 1))
+                continue
+            index[(message_id, window)] = None
+            if len(index) > max_entries:
+                index.popitem(last=False)
+
+        self._update_stats(data, flags)
+
+        if mode == 'drop':
+            return data[~flags].reset_index(drop=True)
+        data = data.copy()
+        data['Retransmission'] = flags
+        return data
+
+    def _update_stats(self, data, flags):
+        sizes = data['TotalSize'].to_numpy()
+        totals = pd.DataFrame({
+            'messages': 1,
+            'retransmissions': flags.astype(np.int64),
+            'bytes': sizes,
+            'retransmitted_bytes': np.where(flags, sizes, 0),
+        }).groupby(data['Protocol'].to_numpy()).sum()
+        for protocol, row in totals.iterrows():
+            entry = self.stats.setdefault(protocol, [0, 0, 0, 0])
+            for i, value in enumerate(row.tolist()):
+                entry[i] += int(value)
+
+    def overhead(self, protocol):
+        """Retransmission count and the share of received bytes they account for"""
+        messages, retransmissions, total_bytes, retransmitted_bytes = \
+            self.stats.get(protocol, [0, 0, 0, 0])
+        return {
+            'messages': messages,
+            'retransmissions': retransmissions,
+            'retransmitted_bytes': retransmitted_bytes,
+            'retransmission_overhead_percent':
+                retransmitted_bytes / total_bytes * 100 if total_bytes else 0.0,
+        }
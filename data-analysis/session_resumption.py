@@ -0,0 +1,57 @@
+import numpy as np
+from case_handshake import FULL_HANDSHAKE_BYTES, RESUME_HANDSHAKE_BYTES
+
+# Round trips before application data can flow
+FULL_HANDSHAKE_RTTS = 2                       # Sigma1/Sigma2, Sigma3/StatusReport
+RESUME_HANDSHAKE_RTTS = 1                     # Sigma1/Sigma2_Resume
+
+
+class SessionResumptionModel:
+    """Amortised session-layer cost of CASE handshakes, with and without resumption"""
+
+    def __init__(self, hit_rate=0.9, messages_per_session=20, rtt_ms=50.0,
+                 full_crypto_ms=400.0, resume_crypto_ms=5.0):
+        if not 0.0 <= hit_rate <= 1.0:
+            raise ValueError("hit_rate must be between 0 and 1")
+        self.hit_rate = hit_rate
+        self.messages_per_session = messages_per_session
+        self.rtt_ms = rtt_ms
+        self.full_crypto_ms = full_crypto_ms
+        self.resume_crypto_ms = resume_crypto_ms
+
+    def handshake_bytes(self, hit_rate=None):
+        """Expected handshake bytes per (re)connect"""
+        h = self.hit_rate if hit_rate is None else hit_rate
+        return h * RESUME_HANDSHAKE_BYTES + (1 - h) * FULL_HANDSHAKE_BYTES
+
+    def reconnect_latency_ms(self, hit_rate=None):
+        """Expected time from reconnect to first application message"""
+        h = self.hit_rate if hit_rate is None else hit_rate
+        full = FULL_HANDSHAKE_RTTS * self.rtt_ms + self.full_crypto_ms
+        resume = RESUME_HANDSHAKE_RTTS * self.rtt_ms + self.resume_crypto_ms
+        return h * resume + (1 - h) * full
+
+    def apply(self, data, inplace=False):
+        """Add per-message session overhead including the amortised handshake (Matter rows only)"""
+        if not inplace:
+            data = data.copy()
+        is_matter = (data['Protocol'] == 'Matter').to_numpy()
+        amortized = np.where(is_matter, self.handshake_bytes() / self.messages_per_session, 0.0)
+        data['HandshakeBytesAmortized'] = amortized
+        data['SessionOverheadWithHandshake'] = data['SessionOverhead'] + amortized
+        data['EfficiencyPercentWithHandshake'] = (
+            data['PayloadSize'] / (data['TotalSize'] + amortized) * 100
+        )
+        return data
+
+    def fleet_savings(self, fleet_size, reconnects_per_device_per_day):
+        """Daily handshake bytes and reconnect time saved by resumption across a fleet"""
+        reconnects = fleet_size * reconnects_per_device_per_day
+        bytes_saved = reconnects * (self.handshake_bytes(0.0) - self.handshake_bytes())
+        latency_saved = self.reconnect_latency_ms(0.0) - self.reconnect_latency_ms()
+        return {
+            'reconnects_per_day': reconnects,
+            'handshake_bytes_saved_per_day': bytes_saved,
+            'latency_saved_ms_per_reconnect': latency_saved,
+            'device_hours_saved_per_day': reconnects * latency_saved / 3.6e6,
+        }
@@ -0,0 +1,39 @@
+import contextlib
+import io
+
+from progressive_analysis import IoTProtocolAnalyzer, ProgressiveAnalyzer, interleave, iter_frame_chunks
+
+
+def _simulated_chunks(chunksize):
+    source = IoTProtocolAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        source.create_simulated_lwm2m_data()
+        source.create_simulated_matter_data()
+    return interleave(iter_frame_chunks(source.lwm2m_data, chunksize),
+                      iter_frame_chunks(source.matter_data, chunksize))
+
+
+def test_first_chunk_interval_covers_exact_result():
+    chunks = _simulated_chunks(10)
+    analyzer = ProgressiveAnalyzer()
+    for chunk in [next(chunks), next(chunks)]:
+        chunk = analyzer._prepare(chunk)
+        analyzer.reservoir.update(chunk)
+        analyzer.moments.update(chunk)
+    preliminary = analyzer.preliminary_estimates()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        exact = ProgressiveAnalyzer(refresh_seconds=3600).run(_simulated_chunks(10))
+
+    for key in ['size_difference', 'efficiency_gap']:
+        interval = preliminary[f'{key}_ci']
+        assert interval > 0
+        assert abs(preliminary[key] - exact[key]) <= interval
+
+
+def test_missing_protocol_skips_comparison():
+    source = IoTProtocolAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        source.create_simulated_matter_data()
+        result = ProgressiveAnalyzer().run(iter_frame_chunks(source.matter_data, 10))
+    assert result is None
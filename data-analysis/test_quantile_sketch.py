@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from protocol_analyzer import IoTProtocolAnalyzer
+from quantile_sketch import QuantileSketch, SketchCollection, save_sketches_next_to, sketch_path_for
+
+
+def test_exact_histogram_matches_numpy():
+    values = np.random.default_rng(7).integers(45, 60, size=50)
+    sketch = QuantileSketch()
+    sketch.update_many(values)
+
+    counts, edges = sketch.histogram(bins=15)
+    expected_counts, expected_edges = np.histogram(values, bins=15)
+    np.testing.assert_allclose(edges, expected_edges)
+    np.testing.assert_allclose(counts, expected_counts)
+    assert counts.sum() == len(values)
+
+    density, _ = sketch.histogram(bins=15, density=True)
+    np.testing.assert_allclose(density, np.histogram(values, bins=15, density=True)[0])
+
+
+def test_exact_histogram_matches_numpy_for_explicit_edges():
+    values = np.array([1.0, 1.0, 2.0, 3.0, 3.0, 5.0])
+    sketch = QuantileSketch()
+    sketch.update_many(values)
+
+    bins = [1.0, 2.0, 3.0, 4.0]
+    np.testing.assert_allclose(sketch.histogram(bins=bins)[0], np.histogram(values, bins=bins)[0])
+
+
+def test_loading_a_capture_writes_no_sketch_file(tmp_path):
+    csv_file = tmp_path / 'matter.csv'
+    csv_file.write_text("Timestamp,Protocol,MessageID,TotalSize,PayloadSize,TransportOverhead\n"
+                        "1,Matter,1,120,20,40\n")
+    analyzer = IoTProtocolAnalyzer()
+    analyzer.load_matter_data(str(csv_file))
+    assert list(tmp_path.iterdir()) == [csv_file]
+
+    assert analyzer.save_sketches() == [sketch_path_for(str(csv_file))]
+    restored = SketchCollection.load(sketch_path_for(str(csv_file)))
+    assert restored.get('Matter', 'TotalSize').n == 1
+
+
+def test_unwritable_sketch_location_warns_instead_of_failing(tmp_path):
+    collection = SketchCollection()
+    collection.update_frame(pd.DataFrame({'Protocol': ['Matter'], 'TotalSize': [120]}))
+    assert save_sketches_next_to(collection, 'Matter', str(tmp_path / 'missing' / 'matter.csv')) is None
@@ -0,0 +1,102 @@
+import pandas as pd
+
+from protocol_analyzer import IoTProtocolAnalyzer
+from retransmission import RetransmissionDetector
+
+# Two sendLwM2MDataUpdate() calls: DEVICE, TEMPERATURE and BATTERY share one MessageID
+ARDUINO_SERIAL_LOG = """=== REAL LwM2M DATA UPDATE ===
+Data: 150611,LwM2M,6,83,40,8,12,15,8
+Data: 150618,LwM2M,6,45,2,8,12,15,8
+Data: 150624,LwM2M,6,46,3,8,12,15,8
+=== REAL LwM2M DATA UPDATE ===
+Data: 180611,LwM2M,7,84,41,8,12,15,8
+Data: 180617,LwM2M,7,45,2,8,12,15,8
+Data: 180623,LwM2M,7,46,3,8,12,15,8
+"""
+
+
+def test_objects_of_one_arduino_update_are_not_retransmissions(tmp_path):
+    serial_log = tmp_path / 'serial.log'
+    serial_log.write_text(ARDUINO_SERIAL_LOG)
+
+    for dedup in ('drop', 'flag'):
+        analyzer = IoTProtocolAnalyzer(dedup=dedup)
+        analyzer.load_lwm2m_data(str(serial_log))
+        assert len(analyzer.lwm2m_data) == 6
+        assert analyzer.retransmissions.overhead('LwM2M')['retransmissions'] == 0
+
+
+def test_repeated_arduino_message_is_dropped(tmp_path):
+    serial_log = tmp_path / 'serial.log'
+    serial_log.write_text(ARDUINO_SERIAL_LOG + "Data: 180650,LwM2M,7,45,2,8,12,15,8\n")
+
+    analyzer = IoTProtocolAnalyzer(dedup='drop')
+    analyzer.load_lwm2m_data(str(serial_log))
+    assert len(analyzer.lwm2m_data) == 6
+    assert analyzer.retransmissions.overhead('LwM2M')['retransmissions'] == 1
+
+
+def _messages(message_ids, timestamps=None, total_size=50):
+    return pd.DataFrame({
+        'Timestamp': timestamps if timestamps is not None else [0] * len(message_ids),
+        'Protocol': 'LwM2M',
+        'MessageID': message_ids,
+        'TotalSize': total_size,
+        'PayloadSize': 10,
+    })
+
+
+def test_repeat_in_current_window_is_flagged():
+    detector = RetransmissionDetector(window_ms=1000)
+    flagged = detector.process(_messages([1, 2, 1], [100, 200, 900]), mode='flag')
+    assert flagged['Retransmission'].tolist() == [False, False, True]
+
+
+def test_repeat_in_previous_window_is_flagged():
+    detector = RetransmissionDetector(window_ms=1000)
+    flagged = detector.process(_messages([1, 1], [900, 1100]), mode='flag')
+    assert flagged['Retransmission'].tolist() == [False, True]
+
+
+def test_same_id_two_windows_apart_is_not_flagged():
+    detector = RetransmissionDetector(window_ms=1000)
+    flagged = detector.process(_messages([1, 1], [900, 2100]), mode='flag')
+    assert flagged['Retransmission'].tolist() == [False, False]
+
+
+def test_repeat_across_chunks_is_flagged():
+    detector = RetransmissionDetector(window_ms=1000)
+    detector.process(_messages([1]), mode='flag')
+    assert detector.process(_messages([1]), mode='flag')['Retransmission'].tolist() == [True]
+
+
+def test_hit_refreshes_lru_entry():
+    detector = RetransmissionDetector(max_entries=2)
+    # 1 is refreshed by its repeat, so adding 3 evicts 2 instead
+    flagged = detector.process(_messages([1, 2, 1, 3, 1, 2]), mode='flag')
+    assert flagged['Retransmission'].tolist() == [False, False, True, False, True, False]
+
+
+def test_oldest_entry_is_evicted_at_max_entries():
+    detector = RetransmissionDetector(max_entries=2)
+    flagged = detector.process(_messages([1, 2, 3, 1]), mode='flag')
+    assert flagged['Retransmission'].tolist() == [False, False, False, False]
+
+
+def test_flag_mode_keeps_every_row_and_drop_mode_removes_repeats():
+    messages = _messages([1, 2, 1, 2, 3])
+    flagged = RetransmissionDetector().process(messages, mode='flag')
+    assert len(flagged) == len(messages)
+    assert flagged['Retransmission'].sum() == 2
+
+    dropped = RetransmissionDetector().process(messages, mode='drop')
+    assert dropped['MessageID'].tolist() == [1, 2, 3]
+
+
+def test_overhead_counts_retransmitted_bytes():
+    detector = RetransmissionDetector()
+    detector.process(_messages([1, 1, 2], total_size=50), mode='flag')
+    overhead = detector.overhead('LwM2M')
+    assert overhead['messages'] == 3
+    assert overhead['retransmitted_bytes'] == 50
+    assert abs(overhead['retransmission_overhead_percent'] - 100 / 3) < 1e-9
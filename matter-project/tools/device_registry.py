@@ -0,0 +1,256 @@
+# Persistent device registry for the Matter test server
+#
+# Every change is appended to a write-ahead log (registry.wal). Every
+# `compact_every` log records the whole registry is written as a compact
+# binary snapshot (registry.snap) and the log starts over. On startup the
+# snapshot is mmap'ed and the log tail replayed, so devices survive a restart
+# without re-registering or re-commissioning.
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+SNAPSHOT_MAGIC = b'MTRSNAP1'
+WAL_MAGIC = b'MTRWAL01'
+# magic, version, generation, device count, key blob bytes, value blob bytes
+SNAPSHOT_HEADER = struct.Struct('<8sIQIQQ')
+# magic, generation
+WAL_HEADER = struct.Struct('<8sQ')
+# op, key bytes, value bytes, crc32(key + value)
+WAL_RECORD = struct.Struct('<BIII')
+SNAPSHOT_VERSION = 1
+
+OP_PUT = 1
+OP_DELETE = 2
+
+
+def _length_array(values=()):
+    lengths = array('I', values)
+    assert lengths.itemsize == 4
+    return lengths
+
+
+class RegistryCorruptError(Exception):
+    pass
+
+
+class DeviceRegistry:
+    """Dict-like device_id -> device_info store backed by a WAL and binary snapshots"""
+
+    def __init__(self, state_dir, compact_every=10000, fsync=False):
+        self.state_dir = state_dir
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.snapshot_path = os.path.join(state_dir, 'registry.snap')
+        self.wal_path = os.path.join(state_dir, 'registry.wal')
+
+        # Snapshot values stay as raw JSON bytes until first read
+        self._blob = b''
+        self._raw = {}
+        self._decoded = {}
+        self._wal = None
+        self._wal_records = 0
+        self.generation = 0
+
+        os.makedirs(state_dir, exist_ok=True)
+        self._load_snapshot()
+        self._replay_wal()
+
+    # ---- dict interface -------------------------------------------------
+
+    def __getitem__(self, device_id):
+        if device_id in self._decoded:
+            return self._decoded[device_id]
+        start, end = self._raw[device_id]
+        value = json.loads(self._blob[start:end])
+        self._decoded[device_id] = value
+        del self._raw[device_id]
+        return value
+
+    def get(self, device_id, default=None):
+        return self[device_id] if device_id in self else default
+
+    def __setitem__(self, device_id, device_info):
+        if '\0' in device_id:
+            raise ValueError("device_id must not contain NUL characters")
+        value = json.dumps(device_info, separators=(',', ':'), default=str).encode()
+        self._append(OP_PUT, device_id, value)
+        self._raw.pop(device_id, None)
+        self._decoded[device_id] = json.loads(value)
+        self._maybe_compact()
+
+    def __delitem__(self, device_id):
+        if device_id not in self:
+            raise KeyError(device_id)
+        self._append(OP_DELETE, device_id, b'')
+        self._raw.pop(device_id, None)
+        self._decoded.pop(device_id, None)
+        self._maybe_compact()
+
+    def __contains__(self, device_id):
+        return device_id in self._decoded or device_id in self._raw
+
+    def __len__(self):
+        return len(self._decoded) + len(self._raw)
+
+    def __iter__(self):
+        yield from list(self._decoded)
+        yield from list(self._raw)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(device_id, self[device_id]) for device_id in self]
+
+    def values(self):
+        return [self[device_id] for device_id in self]
+
+    # ---- write-ahead log ------------------------------------------------
+
+    def _open_wal(self):
+        self._wal = open(self.wal_path, 'ab')
+
+    def _append(self, op, device_id, value):
+        key = device_id.encode()
+        crc = zlib.crc32(key + value)
+        self._wal.write(WAL_RECORD.pack(op, len(key), len(value), crc) + key + value)
+        self._wal.flush()
+        if self.fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_records += 1
+
+    def _maybe_compact(self):
+        # Only called once the in-memory maps include the logged change
+        if self._wal_records >= self.compact_every:
+            self.snapshot()
+
+    def _write_wal_header(self, generation):
+        tmp_path = self.wal_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(WAL_HEADER.pack(WAL_MAGIC, generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.wal_path)
+
+    def _replay_wal(self):
+        if not os.path.exists(self.wal_path):
+            self._write_wal_header(self.generation)
+            self._open_wal()
+            return
+
+        with open(self.wal_path, 'rb') as f:
+            data = f.read()
+        magic, generation = WAL_HEADER.unpack_from(data) if len(data) >= WAL_HEADER.size else (None, None)
+        if magic != WAL_MAGIC or generation < self.generation:
+            # Log predates the snapshot (crash between snapshot and log reset)
+            self._write_wal_header(self.generation)
+            self._open_wal()
+            return
+
+        offset = WAL_HEADER.size
+        view = memoryview(data)
+        while offset + WAL_RECORD.size <= len(data):
+            op, key_len, value_len, crc = WAL_RECORD.unpack_from(data, offset)
+            body_start = offset + WAL_RECORD.size
+            body_end = body_start + key_len + value_len
+            if body_end > len(data) or zlib.crc32(view[body_start:body_end]) != crc:
+                break  # torn write at the tail
+            device_id = bytes(view[body_start:body_start + key_len]).decode()
+            self._raw.pop(device_id, None)
+            if op == OP_PUT:
+                self._decoded[device_id] = json.loads(bytes(view[body_start + key_len:body_end]))
+            else:
+                self._decoded.pop(device_id, None)
+            self._wal_records += 1
+            offset = body_end
+
+        view.release()
+        self._open_wal()
+        if offset < len(data):
+            self._wal.truncate(offset)
+
+    # ---- snapshots ------------------------------------------------------
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                magic, version, generation, count, key_bytes, value_bytes = \
+                    SNAPSHOT_HEADER.unpack_from(mm)
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                    raise RegistryCorruptError(f"{self.snapshot_path} is not a registry snapshot")
+
+                lengths_start = SNAPSHOT_HEADER.size
+                keys_start = lengths_start + 4 * count
+                values_start = keys_start + key_bytes
+                values_end = values_start + value_bytes
+                (crc,) = struct.unpack_from('<I', mm, values_end)
+                if zlib.crc32(mm[SNAPSHOT_HEADER.size:values_end]) != crc:
+                    raise RegistryCorruptError(f"{self.snapshot_path} failed its checksum")
+
+                lengths = _length_array()
+                lengths.frombytes(mm[lengths_start:keys_start])
+                if sys.byteorder == 'big':
+                    lengths.byteswap()
+                keys = mm[keys_start:values_start].decode().split('\0') if count else []
+                self._blob = mm[values_start:values_end]
+
+        ends = list(accumulate(lengths))
+        starts = [0] + ends[:-1]
+        self._raw = dict(zip(keys, zip(starts, ends)))
+        self.generation = generation
+
+    def snapshot(self):
+        """Write the whole registry as a new snapshot and start a fresh log"""
+        keys = list(self)
+        values = []
+        for device_id in keys:
+            if device_id in self._raw:
+                start, end = self._raw[device_id]
+                values.append(self._blob[start:end])
+            else:
+                values.append(json.dumps(self._decoded[device_id], separators=(',', ':')).encode())
+
+        lengths = _length_array(len(v) for v in values)
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        key_blob = '\0'.join(keys).encode()
+        value_blob = b''.join(values)
+        payload = lengths.tobytes() + key_blob + value_blob
+        generation = self.generation + 1
+
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, generation,
+                                         len(keys), len(key_blob), len(value_blob)))
+            f.write(payload)
+            f.write(struct.pack('<I', zlib.crc32(payload)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # The snapshot now holds everything; only then reset the log
+        self.generation = generation
+        self._wal.close()
+        self._write_wal_header(generation)
+        self._open_wal()
+        self._wal_records = 0
+
+        self._blob = value_blob
+        ends = list(accumulate(len(v) for v in values))
+        self._raw = dict(zip(keys, zip([0] + ends[:-1], ends)))
+        self._decoded = {}
+
+    def close(self, snapshot=True):
+        if self._wal is None:
+            return
+        if snapshot and self._wal_records:
+            self.snapshot()
+        self._wal.close()
+        self._wal = None
@@ -0,0 +1,149 @@
+# Live metrics for the Matter test server, in Prometheus text format
+#
+# Each worker owns a WorkerMetrics and is its only writer, so recording a
+# packet is a handful of plain integer increments with no locking. Workers are
+# summed only when /metrics is scraped.
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAYERS = ('transport', 'session', 'presentation', 'application')
+# Upper bounds (seconds) of the processing latency histogram buckets
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class WorkerMetrics:
+    """Single-writer counters and a fixed-bucket latency histogram"""
+
+    __slots__ = ('packets', 'layer_bytes', 'message_types', 'latency_counts', 'latency_sum')
+
+    def __init__(self):
+        self.packets = 0
+        self.layer_bytes = [0] * len(LAYERS)
+        self.message_types = {}   # message_type -> [packets, payload bytes, total bytes]
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def record(self, message_type, payload, transport, session, presentation, application):
+        self.packets += 1
+        layer_bytes = self.layer_bytes
+        layer_bytes[0] += transport
+        layer_bytes[1] += session
+        layer_bytes[2] += presentation
+        layer_bytes[3] += application
+
+        per_type = self.message_types.get(message_type)
+        if per_type is None:
+            per_type = self.message_types[message_type] = [0, 0, 0]
+        per_type[0] += 1
+        per_type[1] += payload
+        per_type[2] += payload + transport + session + presentation + application
+
+    def observe_latency(self, latency_seconds):
+        self.latency_counts[bisect_left(LATENCY_BUCKETS, latency_seconds)] += 1
+        self.latency_sum += latency_seconds
+
+
+def _label_value(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """All workers' metrics; aggregation happens at scrape time only"""
+
+    def __init__(self):
+        self._workers = []
+        self._lock = threading.Lock()   # guards registration, never the hot path
+
+    def worker(self):
+        metrics = WorkerMetrics()
+        with self._lock:
+            self._workers.append(metrics)
+        return metrics
+
+    def render_prometheus(self):
+        with self._lock:
+            workers = list(self._workers)
+
+        packets = sum(w.packets for w in workers)
+        layer_bytes = [sum(w.layer_bytes[i] for w in workers) for i in range(len(LAYERS))]
+        latency_counts = [sum(w.latency_counts[i] for w in workers)
+                          for i in range(len(LATENCY_BUCKETS) + 1)]
+        latency_sum = sum(w.latency_sum for w in workers)
+        message_types = {}
+        for w in workers:
+            for message_type, (count, payload, total) in list(w.message_types.items()):
+                agg = message_types.setdefault(message_type, [0, 0, 0])
+                agg[0] += count
+                agg[1] += payload
+                agg[2] += total
+
+        lines = [
+            '# HELP matter_server_packets_total Packets processed by the server.',
+            '# TYPE matter_server_packets_total counter',
+            f'matter_server_packets_total {packets}',
+            '# HELP matter_server_overhead_bytes_total Header bytes received per OSI layer.',
+            '# TYPE matter_server_overhead_bytes_total counter',
+        ]
+        lines += [f'matter_server_overhead_bytes_total{{layer="{layer}"}} {value}'
+                  for layer, value in zip(LAYERS, layer_bytes)]
+
+        lines += [
+            '# HELP matter_server_message_packets_total Packets per message type.',
+            '# TYPE matter_server_message_packets_total counter',
+        ]
+        message_types = sorted((_label_value(t), v) for t, v in message_types.items())
+        lines += [f'matter_server_message_packets_total{{message_type="{t}"}} {v[0]}'
+                  for t, v in message_types]
+        lines += [
+            '# HELP matter_server_message_bytes_total Payload and total bytes per message type.',
+            '# TYPE matter_server_message_bytes_total counter',
+        ]
+        for t, v in message_types:
+            lines.append(f'matter_server_message_bytes_total{{message_type="{t}",kind="payload"}} {v[1]}')
+            lines.append(f'matter_server_message_bytes_total{{message_type="{t}",kind="total"}} {v[2]}')
+        lines += [
+            '# HELP matter_server_message_efficiency_percent Payload share of bytes per message type.',
+            '# TYPE matter_server_message_efficiency_percent gauge',
+        ]
+        lines += [f'matter_server_message_efficiency_percent{{message_type="{t}"}} '
+                  f'{(v[1] / v[2] * 100) if v[2] else 0.0:.3f}'
+                  for t, v in message_types]
+
+        lines += [
+            '# HELP matter_server_processing_latency_seconds Time spent handling one packet.',
+            '# TYPE matter_server_processing_latency_seconds histogram',
+        ]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, latency_counts):
+            cumulative += count
+            lines.append(f'matter_server_processing_latency_seconds_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += latency_counts[-1]
+        lines.append(f'matter_server_processing_latency_seconds_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f'matter_server_processing_latency_seconds_sum {latency_sum}')
+        lines.append(f'matter_server_processing_latency_seconds_count {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(registry, port=9464, host='127.0.0.1'):
+    """Serve GET /metrics from a daemon thread; returns the HTTP server"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of the server console
+
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
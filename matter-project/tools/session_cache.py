@@ -0,0 +1,90 @@
+# CASE session resumption cache for the Matter test server
+#
+# After a full CASE handshake the server keeps the session's resumption ID and
+# shared secret. A device reconnecting with that ID inside the TTL can resume
+# with Sigma1-with-resumption / Sigma2_Resume instead of the certificate-heavy
+# Sigma1 / Sigma2 / Sigma3 exchange.
+import importlib.util
+import os
+import time
+from collections import OrderedDict
+
+# CASE message sizes live with the analysis (data-analysis/case_handshake.py)
+# so the server and the resumption model always agree
+_CASE_HANDSHAKE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+                                    'data-analysis', 'case_handshake.py')
+_spec = importlib.util.spec_from_file_location('case_handshake', _CASE_HANDSHAKE_PATH)
+_case_handshake = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_case_handshake)
+FULL_HANDSHAKE_BYTES = _case_handshake.FULL_HANDSHAKE_BYTES
+RESUME_HANDSHAKE_BYTES = _case_handshake.RESUME_HANDSHAKE_BYTES
+
+RESUMPTION_ID_BYTES = 16
+
+
+class SessionResumptionCache:
+    """Bounded LRU of resumable CASE sessions with TTL expiry"""
+
+    def __init__(self, capacity=10000, ttl_seconds=3600, clock=time.monotonic):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()   # resumption_id -> (node_id, shared_secret, expires_at)
+        self._by_node = {}              # node_id -> resumption_id
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, resumption_id):
+        node_id, _, _ = self._entries.pop(resumption_id)
+        if self._by_node.get(node_id) == resumption_id:
+            del self._by_node[node_id]
+
+    def store(self, node_id, shared_secret):
+        """Remember a freshly established session; returns its new resumption ID"""
+        previous = self._by_node.get(node_id)
+        if previous is not None:
+            self._drop(previous)
+
+        resumption_id = os.urandom(RESUMPTION_ID_BYTES)
+        self._entries[resumption_id] = (node_id, shared_secret, self.clock() + self.ttl_seconds)
+        self._by_node[node_id] = resumption_id
+
+        while len(self._entries) > self.capacity:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+        return resumption_id
+
+    def resume(self, resumption_id, node_id):
+        """(shared_secret, new resumption ID) on a hit, or None when a full handshake is needed"""
+        entry = self._entries.get(resumption_id)
+        if entry is None or entry[0] != node_id:
+            self.misses += 1
+            return None
+        if entry[2] <= self.clock():
+            self._drop(resumption_id)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        # A resumed session gets a fresh resumption ID and TTL, like a new one
+        self.hits += 1
+        shared_secret = entry[1]
+        return shared_secret, self.store(node_id, shared_secret)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,16 +1,33 @@
 # Simple Matter server for testing
+import argparse
 import asyncio
 import json
+import os
+import time
 from datetime import datetime
+from device_registry import DeviceRegistry
+from session_cache import SessionResumptionCache, FULL_HANDSHAKE_BYTES, RESUME_HANDSHAKE_BYTES
+from server_metrics import MetricsRegistry, start_metrics_server
 
 class SimpleMatterServer:
-    def __init__(self):
-        self.devices = {}
+    def __init__(self, state_dir=None, session_capacity=10000, session_ttl=3600, metrics_port=None):
+        # With a state directory the registry survives restarts (WAL + snapshots)
+        self.devices = DeviceRegistry(state_dir) if state_dir else {}
+        self.sessions = SessionResumptionCache(capacity=session_capacity, ttl_seconds=session_ttl)
+        self.handshake_bytes = 0
+        self.last_seen = {}
+        self.metrics = MetricsRegistry()
+        self.worker_metrics = self.metrics.worker()
+        self.metrics_port = metrics_port
+        self.metrics_server = None
         self.running = False
     
     async def start_server(self):
         self.running = True
         print(f"[{datetime.now()}] Simple Matter Server Started")
+        if self.metrics_port and self.metrics_server is None:
+            self.metrics_server = start_metrics_server(self.metrics, port=self.metrics_port)
+            print(f"Metrics at http://127.0.0.1:{self.metrics_port}/metrics")
         print("Listening for Matter devices...")
         
         while self.running:
@@ -26,12 +43,68 @@ class SimpleMatterServer:
         self.devices[device_id] = device_info
         print(f"Device added: {device_id}")
     
+    def remove_device(self, device_id):
+        del self.devices[device_id]
+        print(f"Device removed: {device_id}")
+    
+    def handle_message(self, device_id, message_type, payload_size, transport=40, session=35,
+                       presentation=8, application=25, metrics=None, received_at=None):
+        """Account one received Matter message; metrics is the calling worker's WorkerMetrics"""
+        metrics = metrics or self.worker_metrics
+        # Latency runs from socket receive (perf_counter, when the caller has it) to the end of handling
+        start = time.perf_counter() if received_at is None else received_at
+        device = self.devices.get(device_id)
+        if device is not None:
+            self.last_seen[device_id] = time.time()
+        metrics.record(message_type, payload_size, transport, session, presentation, application)
+        metrics.observe_latency(time.perf_counter() - start)
+        return device is not None
+    
+    def establish_session(self, device_id, resumption_id=None):
+        """CASE session setup, resumed from the cache when the device offers a valid resumption ID"""
+        if resumption_id is not None:
+            resumed = self.sessions.resume(resumption_id, device_id)
+            if resumed is not None:
+                _, new_resumption_id = resumed
+                self.handshake_bytes += RESUME_HANDSHAKE_BYTES
+                return {'resumed': True, 'resumption_id': new_resumption_id,
+                        'handshake_bytes': RESUME_HANDSHAKE_BYTES}
+        
+        # Stands in for the shared secret derived during Sigma1/Sigma2/Sigma3
+        shared_secret = os.urandom(32)
+        new_resumption_id = self.sessions.store(device_id, shared_secret)
+        self.handshake_bytes += FULL_HANDSHAKE_BYTES
+        return {'resumed': False, 'resumption_id': new_resumption_id,
+                'handshake_bytes': FULL_HANDSHAKE_BYTES}
+    
     def stop_server(self):
         self.running = False
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+        if isinstance(self.devices, DeviceRegistry):
+            self.devices.close()
+        print(f"Session cache: {json.dumps(self.sessions.stats())}")
+        print(f"Handshake bytes: {self.handshake_bytes}")
         print("Server stopped")
 
 if __name__ == "__main__":
-    server = SimpleMatterServer()
+    parser = argparse.ArgumentParser(description="Simple Matter server for testing")
+    parser.add_argument('--state-dir', help="Persist the device registry in this directory")
+    parser.add_argument('--session-capacity', type=int, default=10000,
+                        help="Maximum number of resumable CASE sessions kept")
+    parser.add_argument('--session-ttl', type=float, default=3600,
+                        help="Seconds a session stays resumable")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    server = SimpleMatterServer(state_dir=args.state_dir, session_capacity=args.session_capacity,
+                                session_ttl=args.session_ttl, metrics_port=args.metrics_port)
+    if args.state_dir:
+        print(f"Restored {len(server.devices)} devices in {(time.perf_counter() - start) * 1000:.1f} ms")
     try:
         asyncio.run(server.start_server())
     except KeyboardInterrupt:
@@ -0,0 +1,41 @@
+from device_registry import DeviceRegistry
+
+
+def test_put_on_compaction_boundary_survives_restart(tmp_path):
+    registry = DeviceRegistry(str(tmp_path), compact_every=10)
+    for i in range(10):
+        registry[f'device-{i}'] = {'node_id': i}
+    registry.close()
+
+    restored = DeviceRegistry(str(tmp_path), compact_every=10)
+    assert len(restored) == 10
+    assert restored['device-9'] == {'node_id': 9}
+    restored.close()
+
+
+def test_delete_on_compaction_boundary_survives_restart(tmp_path):
+    registry = DeviceRegistry(str(tmp_path), compact_every=3)
+    registry['a'] = {'node_id': 1}
+    registry['b'] = {'node_id': 2}
+    del registry['a']
+    registry.close()
+
+    restored = DeviceRegistry(str(tmp_path), compact_every=3)
+    assert 'a' not in restored
+    assert restored.keys() == ['b']
+    restored.close()
+
+
+def test_boundary_write_survives_crash_without_close(tmp_path):
+    registry = DeviceRegistry(str(tmp_path), compact_every=4)
+    for i in range(4):
+        registry[f'device-{i}'] = {'node_id': i}
+    del registry['device-0']
+    registry['device-1'] = {'node_id': 100}
+    # No close(): only the snapshot and the log tail are on disk
+
+    restored = DeviceRegistry(str(tmp_path), compact_every=4)
+    assert sorted(restored.keys()) == ['device-1', 'device-2', 'device-3']
+    assert restored['device-1'] == {'node_id': 100}
+    restored.close()
+    registry.close(snapshot=False)